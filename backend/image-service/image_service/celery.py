@@ -17,4 +17,12 @@ app.conf.beat_schedule = {
         'task': 'images.tasks.expire_download_tokens',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    'refresh-catalog-popularity': {
+        'task': 'images.tasks.refresh_catalog_popularity',
+        'schedule': crontab(minute=0),  # Hourly
+    },
+    'expire-upload-sessions': {
+        'task': 'images.tasks.expire_upload_sessions',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
 }
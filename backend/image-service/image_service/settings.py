@@ -144,16 +144,76 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Cache (search results, catalog generation counter)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/1",
+        'KEY_PREFIX': 'image_service',
+    }
+}
+SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'True') == 'True'
+SEARCH_CACHE_TIMEOUT = int(os.getenv('SEARCH_CACHE_TIMEOUT', 300))  # seconds
+
+# Autocomplete (in-memory vocabulary, pg_trgm fallback)
+SUGGEST_REBUILD_INTERVAL = int(os.getenv('SUGGEST_REBUILD_INTERVAL', 3600))  # seconds
+SUGGEST_MAX_DELTAS = int(os.getenv('SUGGEST_MAX_DELTAS', 500))  # rebuild when further behind
+SUGGEST_DELTA_TTL = int(os.getenv('SUGGEST_DELTA_TTL', 86400))  # seconds
+SUGGEST_TOP_PREFIX_LENGTH = int(os.getenv('SUGGEST_TOP_PREFIX_LENGTH', 3))  # Prefixes up to this length use top-k lists
+SUGGEST_TOP_K = int(os.getenv('SUGGEST_TOP_K', 50))  # Heaviest terms kept per short prefix (>= max limit)
+SUGGEST_FUZZY_MIN_LENGTH = int(os.getenv('SUGGEST_FUZZY_MIN_LENGTH', 3))
+
+# Similar images (MinHash + LSH); changing hashes or bands requires rebuild_image_signatures
+SIMILARITY_NUM_HASHES = int(os.getenv('SIMILARITY_NUM_HASHES', 64))
+SIMILARITY_BANDS = int(os.getenv('SIMILARITY_BANDS', 16))  # 4 rows per band
+SIMILARITY_MAX_CANDIDATES = int(os.getenv('SIMILARITY_MAX_CANDIDATES', 1000))
+SIMILARITY_MIN_SCORE = float(os.getenv('SIMILARITY_MIN_SCORE', 0.1))
+
+# Order service catalog replica (image change events)
+ORDER_SERVICE_URL = os.getenv('ORDER_SERVICE_URL', 'http://localhost:8003')
+INTERNAL_SERVICE_TOKEN = os.getenv('INTERNAL_SERVICE_TOKEN', '')  # Events are not sent when empty
+IMAGE_EVENT_TIMEOUT = float(os.getenv('IMAGE_EVENT_TIMEOUT', 5))  # seconds
+IMAGE_EVENT_MAX_RETRIES = int(os.getenv('IMAGE_EVENT_MAX_RETRIES', 10))  # Backoff capped at 10 minutes
+
 # Storage Configuration
 STORAGE_ROOT = os.getenv('STORAGE_ROOT', '/var/www/agency_storage')
 STORAGE_ARCHIVE_ROOT = os.getenv('STORAGE_ARCHIVE_ROOT', '/var/www/agency_storage/archive')
 
 # Image Processing Configuration
 WATERMARK_TEXT = os.getenv('WATERMARK_TEXT', 'Agency Watermark')
+WATERMARK_ENGINE = os.getenv('WATERMARK_ENGINE', 'vips')  # vips or pillow
+WATERMARK_FONT = os.getenv('WATERMARK_FONT', 'DejaVu Sans Bold')
+WATERMARK_CACHE_DIR = os.getenv('WATERMARK_CACHE_DIR', os.path.join(STORAGE_ROOT, '.watermark_cache'))
+WATERMARK_CACHE_SIZE = int(os.getenv('WATERMARK_CACHE_SIZE', 64))  # overlays kept in memory
 THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', 200))
 PREVIEW_SIZE = int(os.getenv('PREVIEW_SIZE', 1024))
 MEDIUM_SIZE = int(os.getenv('MEDIUM_SIZE', 2048))
 
-# Maximum upload size (100MB)
-DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
-FILE_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
+# Derivative pipeline: 'single_decode' (shrink-on-load, cascade from medium) or 'legacy'
+DERIVATIVE_PIPELINE = os.getenv('DERIVATIVE_PIPELINE', 'single_decode')
+VIPS_CACHE_MAX_MEM = int(os.getenv('VIPS_CACHE_MAX_MEM', 104857600))  # 100MB
+
+# Optional secondary upload hash computed alongside MD5 (any hashlib name, e.g. blake2b)
+UPLOAD_SECONDARY_HASH = os.getenv('UPLOAD_SECONDARY_HASH', '')
+
+# Uploads are streamed to a temp dir on the STORAGE_ROOT filesystem (hashed as
+# they arrive) and renamed into place, so they never sit in worker memory
+FILE_UPLOAD_HANDLERS = ['images.upload_handlers.HashingFileUploadHandler']
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR', os.path.join(STORAGE_ROOT, '.uploads'))
+FILE_UPLOAD_PERMISSIONS = 0o644
+
+# Resumable chunked uploads
+UPLOAD_SESSION_DIR = os.getenv('UPLOAD_SESSION_DIR', os.path.join(FILE_UPLOAD_TEMP_DIR, 'sessions'))
+UPLOAD_SESSION_CHUNK_SIZE = int(os.getenv('UPLOAD_SESSION_CHUNK_SIZE', 8388608))  # 8MB
+UPLOAD_SESSION_MAX_SIZE = int(os.getenv('UPLOAD_SESSION_MAX_SIZE', 4294967296))  # 4GB
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 86400))  # seconds without a chunk before a session is swept
+UPLOAD_SESSION_MAX_OPEN = int(os.getenv('UPLOAD_SESSION_MAX_OPEN', 10))  # open sessions per uploader
+UPLOAD_SESSION_MAX_OPEN_BYTES = int(os.getenv('UPLOAD_SESSION_MAX_OPEN_BYTES', 8589934592))  # 8GB preallocated per uploader
+
+# Bulk ZIP ingest
+BULK_INGEST_BATCH_SIZE = int(os.getenv('BULK_INGEST_BATCH_SIZE', 100))  # entries per dedupe/insert batch
+BULK_INGEST_MAX_ENTRY_SIZE = int(os.getenv('BULK_INGEST_MAX_ENTRY_SIZE', 209715200))  # 200MB
+BULK_INGEST_DELETE_ARCHIVE = os.getenv('BULK_INGEST_DELETE_ARCHIVE', 'True') == 'True'
+
+# Maximum size of non-file request data held in memory
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
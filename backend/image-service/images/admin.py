@@ -4,7 +4,8 @@ Admin configuration for images app
 from django.contrib import admin
 from .models import (
     Category, Topic, Place, Image, ImageDerivative,
-    ImageMetadata, Review, UploadTask
+    ImageMetadata, Review, UploadTask, UploadSession, BulkIngest,
+    SuggestionTerm
 )
 
 
@@ -30,12 +31,13 @@ class PlaceAdmin(admin.ModelAdmin):
     list_filter = ['type', 'is_active']
     search_fields = ['name', 'slug']
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ['geohash']
 
 
 class ImageDerivativeInline(admin.TabularInline):
     model = ImageDerivative
     extra = 0
-    readonly_fields = ['kind', 'file_path', 'width', 'height', 'filesize', 'is_watermarked']
+    readonly_fields = ['kind', 'file_path', 'width', 'height', 'filesize', 'is_watermarked', 'spec_version']
 
 
 class ImageMetadataInline(admin.TabularInline):
@@ -64,4 +66,32 @@ class UploadTaskAdmin(admin.ModelAdmin):
     list_display = ['original_filename', 'uploader_id', 'status', 'created_at', 'finished_at']
     list_filter = ['status', 'created_at']
     search_fields = ['original_filename']
-    readonly_fields = ['uploader_id', 'original_filename', 'file_path', 'status', 'error_message']
+    readonly_fields = [
+        'uploader_id', 'original_filename', 'file_path', 'status', 'error_message',
+        'md5', 'secondary_hash', 'filesize', 'width', 'height', 'mime_type',
+    ]
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['original_filename', 'uploader_id', 'status', 'received_bytes', 'total_size', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['original_filename']
+    readonly_fields = ['uploader_id', 'original_filename', 'temp_path', 'received_ranges', 'received_bytes', 'upload_task']
+
+
+@admin.register(BulkIngest)
+class BulkIngestAdmin(admin.ModelAdmin):
+    list_display = [
+        'original_filename', 'uploader_id', 'status', 'total_entries',
+        'created_images', 'duplicate_entries', 'failed_entries', 'created_at'
+    ]
+    list_filter = ['status', 'created_at']
+    search_fields = ['original_filename']
+
+
+@admin.register(SuggestionTerm)
+class SuggestionTermAdmin(admin.ModelAdmin):
+    list_display = ['text', 'kind', 'weight']
+    list_filter = ['kind']
+    search_fields = ['text', 'normalized']
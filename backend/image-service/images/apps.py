@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate
+import os
 
 
 class ImagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'images'
+
+    def ready(self):
+        # Upload temp dirs live on the storage volume, which starts empty; they
+        # must exist before the files.E001 system check runs
+        for path in (settings.FILE_UPLOAD_TEMP_DIR, settings.UPLOAD_SESSION_DIR):
+            try:
+                os.makedirs(path, exist_ok=True)
+            except OSError:
+                pass  # Read-only or unmounted storage: the system check reports it
+
+        from .search_vectors import install_search_triggers
+        from .suggestions import install_trigram_index
+        from .keywords import install_keyword_triggers
+        from .catalog import install_catalog_function
+        post_migrate.connect(install_search_triggers, sender=self)
+        post_migrate.connect(install_keyword_triggers, sender=self)
+        post_migrate.connect(install_catalog_function, sender=self)
+        post_migrate.connect(install_trigram_index, sender=self)
@@ -0,0 +1,158 @@
+"""
+Public catalog read model
+
+public_catalog holds one denormalized row per published image (category
+path, topic/place ID arrays, derivatives, titles, search vectors and
+popularity) so public list and search pages are single-table scans. Rows
+are upserted, or removed when the image is no longer published, by
+set-based SQL; views and tasks call refresh_catalog() wherever an
+image is published, archived or edited, and rebuild_public_catalog
+replays it over the whole table.
+"""
+from django.db import connection, connections
+from .models import Image, Category
+
+POPULARITY_SQL = 'i.view_count + 5 * i.download_count + 10 * i.purchase_count'
+
+
+def build_refresh_sql(where):
+    """Delete + upsert statements for the images selected by {where} (alias i)"""
+    image_topics = Image.topics.through._meta
+    image_places = Image.places.through._meta
+
+    delete_sql = f"""
+        DELETE FROM public_catalog AS pc
+         USING images AS i
+         WHERE pc.image_id = i.id AND ({where}) AND i.status <> 'published'
+    """
+
+    upsert_sql = f"""
+        WITH RECURSIVE category_paths AS (
+            SELECT id, name::text AS path FROM categories WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, cp.path || ' > ' || c.name
+              FROM categories AS c
+              JOIN category_paths AS cp ON c.parent_id = cp.id
+        )
+        INSERT INTO public_catalog (
+            image_id, filename, type, width, height, orientation,
+            category_id, category_name, category_path, topic_ids, place_ids,
+            derivatives, titles,
+            search_vector, search_vector_en, search_vector_fr, search_vector_ar,
+            view_count, purchase_count, popularity, created_at, published_at
+        )
+        SELECT i.id, i.filename, i.type, i.width, i.height, i.orientation,
+               i.category_id, coalesce(c.name, ''), coalesce(cp.path, ''),
+               ARRAY(
+                   SELECT it.{image_topics.get_field('topic').column}
+                     FROM {image_topics.db_table} AS it
+                    WHERE it.{image_topics.get_field('image').column} = i.id
+                    ORDER BY 1
+               ),
+               ARRAY(
+                   SELECT ip.{image_places.get_field('place').column}
+                     FROM {image_places.db_table} AS ip
+                    WHERE ip.{image_places.get_field('image').column} = i.id
+                    ORDER BY 1
+               ),
+               i.derivatives_summary,
+               coalesce((
+                   SELECT jsonb_object_agg(m.language, m.title)
+                     FROM image_metadata AS m
+                    WHERE m.image_id = i.id
+               ), '{{}}'::jsonb),
+               i.search_vector, i.search_vector_en, i.search_vector_fr, i.search_vector_ar,
+               i.view_count, i.purchase_count, {POPULARITY_SQL},
+               i.created_at, i.published_at
+          FROM images AS i
+          LEFT JOIN categories AS c ON c.id = i.category_id
+          LEFT JOIN category_paths AS cp ON cp.id = i.category_id
+         WHERE ({where}) AND i.status = 'published'
+        ON CONFLICT (image_id) DO UPDATE SET
+            filename = EXCLUDED.filename,
+            type = EXCLUDED.type,
+            width = EXCLUDED.width,
+            height = EXCLUDED.height,
+            orientation = EXCLUDED.orientation,
+            category_id = EXCLUDED.category_id,
+            category_name = EXCLUDED.category_name,
+            category_path = EXCLUDED.category_path,
+            topic_ids = EXCLUDED.topic_ids,
+            place_ids = EXCLUDED.place_ids,
+            derivatives = EXCLUDED.derivatives,
+            titles = EXCLUDED.titles,
+            search_vector = EXCLUDED.search_vector,
+            search_vector_en = EXCLUDED.search_vector_en,
+            search_vector_fr = EXCLUDED.search_vector_fr,
+            search_vector_ar = EXCLUDED.search_vector_ar,
+            view_count = EXCLUDED.view_count,
+            purchase_count = EXCLUDED.purchase_count,
+            popularity = EXCLUDED.popularity,
+            created_at = EXCLUDED.created_at,
+            published_at = EXCLUDED.published_at
+    """
+    return delete_sql, upsert_sql
+
+
+def install_catalog_function(sender=None, using='default', **kwargs):
+    """Create/refresh images_refresh_catalog(bigint[]) (post_migrate)"""
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    delete_sql, upsert_sql = build_refresh_sql('i.id = ANY(target_ids)')
+    with db.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION images_refresh_catalog(target_ids bigint[])
+            RETURNS void AS $$
+                {delete_sql};
+                {upsert_sql};
+            $$ LANGUAGE sql;
+        """)
+
+
+def refresh_catalog(image_ids):
+    """Bring the catalog rows of the given images up to date"""
+    image_ids = list(image_ids)
+    if not image_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT images_refresh_catalog(%s::bigint[])', [image_ids])
+
+
+def refresh_catalog_range(start_id, end_id):
+    """Refresh images with start_id <= id < end_id; returns rows upserted"""
+    delete_sql, upsert_sql = build_refresh_sql('i.id >= %s AND i.id < %s')
+    with connection.cursor() as cursor:
+        cursor.execute(delete_sql, [start_id, end_id])
+        cursor.execute(upsert_sql, [start_id, end_id])
+        return cursor.rowcount
+
+
+def refresh_catalog_categories(category_ids):
+    """Refresh images filed under the given categories or their subcategories"""
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    selected = set(category_ids)
+    changed = True
+    while changed:
+        children = {child for child, parent in parents.items() if parent in selected}
+        changed = not children <= selected
+        selected |= children
+
+    _, upsert_sql = build_refresh_sql('i.category_id = ANY(%s)')
+    with connection.cursor() as cursor:
+        cursor.execute(upsert_sql, [list(selected)])
+
+
+def refresh_catalog_popularity():
+    """Copy changed view/purchase counters into the catalog; returns rows updated"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE public_catalog AS pc SET
+                view_count = i.view_count,
+                purchase_count = i.purchase_count,
+                popularity = {POPULARITY_SQL}
+              FROM images AS i
+             WHERE i.id = pc.image_id
+               AND pc.popularity IS DISTINCT FROM {POPULARITY_SQL}
+        """)
+        return cursor.rowcount
@@ -0,0 +1,50 @@
+"""
+Image change events for the order service's catalog replica
+
+When the sellable facts of an image change (published, archived, rejected,
+edited, deleted) a snapshot is posted to the order service, which upserts
+it into its local catalog_images table and sells from there. Each snapshot
+carries the image's updated_at as its version, so retried or reordered
+deliveries never overwrite newer state.
+"""
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+LICENSE_TYPES = ['standard', 'extended', 'exclusive']
+
+
+def image_snapshot(image, event='updated'):
+    return {
+        'event': event,
+        'image_id': image.id,
+        'filename': image.filename,
+        'status': image.status,
+        'type': image.type,
+        'category_id': image.category_id,
+        'photographer_id': image.uploader_id,
+        'licenses': LICENSE_TYPES,
+        'version': (image.updated_at or timezone.now()).isoformat(),
+    }
+
+
+def deleted_snapshot(image_id):
+    return {
+        'event': 'deleted',
+        'image_id': image_id,
+        'version': timezone.now().isoformat(),
+    }
+
+
+def emit(snapshots):
+    """Queue snapshots for delivery once the current transaction commits"""
+    if not snapshots or not settings.ORDER_SERVICE_URL or not settings.INTERNAL_SERVICE_TOKEN:
+        return
+    transaction.on_commit(
+        lambda: current_app.send_task('images.tasks.publish_image_events', args=[snapshots])
+    )
+
+
+def emit_images(images, event='updated'):
+    emit([image_snapshot(image, event) for image in images])
@@ -0,0 +1,193 @@
+"""
+Facet counts for image search
+
+All facets are counted in one round trip: the filtered search is a shared
+CTE and each facet is a GROUP BY over it, combined with UNION ALL. Public
+catalog searches count straight from the catalog row (category columns,
+topic/place ID arrays) so they never touch images or the M2M tables.
+"""
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from .models import Image, Category, Topic, Place, CatalogEntry
+
+FACETS = ['category', 'topic', 'place', 'orientation', 'type']
+
+
+def hits_sql(queryset, *fields):
+    """SQL and params selecting fields of the filtered rows, or None when nothing can match"""
+    if queryset.query.is_empty():
+        return None
+    try:
+        return queryset.order_by().values(*fields).query.sql_with_params()
+    except EmptyResultSet:  # e.g. pk__in=[]
+        return None
+
+
+def build_catalog_facets_sql(queryset):
+    """Facet SQL over CatalogEntry rows (no joins besides taxonomy names)"""
+    hits = hits_sql(
+        queryset, 'pk', 'category_id', 'category_name', 'topic_ids', 'place_ids', 'orientation', 'type'
+    )
+    if hits is None:
+        return None
+    sql, params = hits
+    topics = Topic._meta.db_table
+    places = Place._meta.db_table
+
+    return f"""
+        WITH hits AS ({sql})
+        SELECT 'category', hits.category_id, hits.category_name, COUNT(*)
+          FROM hits
+         WHERE hits.category_id IS NOT NULL
+         GROUP BY hits.category_id, hits.category_name
+        UNION ALL
+        SELECT 'topic', t.id, t.name, COUNT(*)
+          FROM hits
+         CROSS JOIN LATERAL unnest(hits.topic_ids) AS ht(id)
+          JOIN {topics} t ON t.id = ht.id
+         GROUP BY t.id, t.name
+        UNION ALL
+        SELECT 'place', p.id, p.name, COUNT(*)
+          FROM hits
+         CROSS JOIN LATERAL unnest(hits.place_ids) AS hp(id)
+          JOIN {places} p ON p.id = hp.id
+         GROUP BY p.id, p.name
+        UNION ALL
+        SELECT 'orientation', NULL, hits.orientation, COUNT(*)
+          FROM hits
+         GROUP BY hits.orientation
+        UNION ALL
+        SELECT 'type', NULL, hits.type, COUNT(*)
+          FROM hits
+         GROUP BY hits.type
+    """, params
+
+
+def build_facets_sql(queryset):
+    """SQL and params counting every facet over the filtered queryset, or None when empty"""
+    if queryset.model is CatalogEntry:
+        return build_catalog_facets_sql(queryset)
+
+    hits = hits_sql(queryset, 'pk')
+    if hits is None:
+        return None
+    hits_query, params = hits
+    hit_column = queryset.model._meta.pk.column
+
+    images = Image._meta.db_table
+    categories = Category._meta.db_table
+    topics = Topic._meta.db_table
+    places = Place._meta.db_table
+
+    image_topics = Image.topics.through._meta
+    image_places = Image.places.through._meta
+    image_topics_table = image_topics.db_table
+    image_places_table = image_places.db_table
+    topic_image_col = image_topics.get_field('image').column
+    topic_col = image_topics.get_field('topic').column
+    place_image_col = image_places.get_field('image').column
+    place_col = image_places.get_field('place').column
+
+    sql = f"""
+        WITH hits AS (
+            SELECT DISTINCT hit.{hit_column} AS id FROM ({hits_query}) hit
+        )
+        SELECT 'category', c.id, c.name, COUNT(*)
+          FROM hits
+          JOIN {images} i ON i.id = hits.id
+          JOIN {categories} c ON c.id = i.category_id
+         GROUP BY c.id, c.name
+        UNION ALL
+        SELECT 'topic', t.id, t.name, COUNT(*)
+          FROM hits
+          JOIN {image_topics_table} it ON it.{topic_image_col} = hits.id
+          JOIN {topics} t ON t.id = it.{topic_col}
+         GROUP BY t.id, t.name
+        UNION ALL
+        SELECT 'place', p.id, p.name, COUNT(*)
+          FROM hits
+          JOIN {image_places_table} ip ON ip.{place_image_col} = hits.id
+          JOIN {places} p ON p.id = ip.{place_col}
+         GROUP BY p.id, p.name
+        UNION ALL
+        SELECT 'orientation', NULL, i.orientation, COUNT(*)
+          FROM hits
+          JOIN {images} i ON i.id = hits.id
+         GROUP BY i.orientation
+        UNION ALL
+        SELECT 'type', NULL, i.type, COUNT(*)
+          FROM hits
+          JOIN {images} i ON i.id = hits.id
+         GROUP BY i.type
+    """
+    return sql, params
+
+
+def compute_facets(queryset):
+    """
+    Count hits per category, topic, place, orientation and type
+
+    Returns {facet: [{'id', 'name', 'count'} or {'value', 'count'}, ...]}
+    sorted by descending count.
+    """
+    facets = {facet: [] for facet in FACETS}
+    built = build_facets_sql(queryset)
+    if built is None:
+        return facets
+
+    sql, params = built
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    for facet, value_id, label, count in rows:
+        if value_id is None:
+            facets[facet].append({'value': label, 'count': count})
+        else:
+            facets[facet].append({'id': value_id, 'name': label, 'count': count})
+    for values in facets.values():
+        values.sort(key=lambda value: -value['count'])
+    return facets
+
+
+def count_by_place(queryset, place_ids):
+    """Hits per place, restricted to place_ids: {place_id: count}"""
+    if not place_ids:
+        return {}
+
+    if queryset.model is CatalogEntry:
+        hits = hits_sql(queryset, 'place_ids')
+        if hits is None:
+            return {}
+        hits_query, params = hits
+        sql = f"""
+            WITH hits AS ({hits_query})
+            SELECT hp.id, COUNT(*)
+              FROM hits
+             CROSS JOIN LATERAL unnest(hits.place_ids) AS hp(id)
+             WHERE hp.id = ANY(%s)
+             GROUP BY hp.id
+        """
+    else:
+        hits = hits_sql(queryset, 'pk')
+        if hits is None:
+            return {}
+        hits_query, params = hits
+        hit_column = queryset.model._meta.pk.column
+        image_places = Image.places.through._meta
+        place_image_col = image_places.get_field('image').column
+        place_col = image_places.get_field('place').column
+        sql = f"""
+            WITH hits AS (
+                SELECT DISTINCT hit.{hit_column} AS id FROM ({hits_query}) hit
+            )
+            SELECT ip.{place_col}, COUNT(*)
+              FROM hits
+              JOIN {image_places.db_table} ip ON ip.{place_image_col} = hits.id
+             WHERE ip.{place_col} = ANY(%s)
+             GROUP BY ip.{place_col}
+        """
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, [*params, list(place_ids)])
+        return dict(cursor.fetchall())
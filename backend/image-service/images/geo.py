@@ -0,0 +1,140 @@
+"""
+Geohash helpers for place-based map and radius search
+
+Each Place stores the geohash of its coordinates. A bounding box is covered
+by a handful of geohash cells at the finest precision that keeps the cell
+count small; candidate places are found with indexed prefix matches on
+those cells and then checked against the exact box (and distance, for
+radius searches).
+"""
+from django.db.models import Q
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9  # ~5m cells, stored on Place
+MAX_CELLS = 32  # Geohash prefixes per bounding-box query
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True  # Bits alternate longitude, latitude
+    while len(geohash) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = bit_count = 0
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """(latitude, longitude) extent in degrees of a cell at precision"""
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng):
+    """Geohash prefixes covering a box that does not cross the antimeridian"""
+    for precision in range(PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+        cols = math.floor(max_lng / lng_step) - math.floor(min_lng / lng_step) + 1
+        if rows * cols <= MAX_CELLS:
+            break
+
+    cells = set()
+    row_start = math.floor(min_lat / lat_step)
+    col_start = math.floor(min_lng / lng_step)
+    for row in range(rows):
+        # Sample each cell at its centre, clamped into the valid range
+        lat = min((row_start + row + 0.5) * lat_step, 90.0 - 1e-9)
+        for col in range(cols):
+            lng = min((col_start + col + 0.5) * lng_step, 180.0 - 1e-9)
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
+
+
+def split_bbox(min_lat, min_lng, max_lat, max_lng):
+    """Boxes crossing the antimeridian (min_lng > max_lng) become two boxes"""
+    if min_lng <= max_lng:
+        return [(min_lat, min_lng, max_lat, max_lng)]
+    return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+
+
+def bbox_filter(min_lat, min_lng, max_lat, max_lng):
+    """Q over Place: geohash prefix scan narrowed to the exact box"""
+    condition = Q(pk__in=[])
+    for box in split_bbox(min_lat, min_lng, max_lat, max_lng):
+        prefixes = Q(pk__in=[])
+        for cell in covering_cells(*box):
+            prefixes |= Q(geohash__startswith=cell)
+        condition |= prefixes & Q(
+            latitude__gte=box[0], latitude__lte=box[2],
+            longitude__gte=box[1], longitude__lte=box[3]
+        )
+    return condition
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """Bounding box of a circle (clamped at the poles)"""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(latitude - lat_delta, -90.0)
+    max_lat = min(latitude + lat_delta, 90.0)
+    if min_lat == -90.0 or max_lat == 90.0:
+        return min_lat, -180.0, max_lat, 180.0
+
+    lng_delta = math.degrees(
+        math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))))
+    )
+    min_lng = longitude - lng_delta
+    max_lng = longitude + lng_delta
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    if lng_delta >= 180.0:
+        min_lng, max_lng = -180.0, 180.0
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def places_in_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    """IDs of places inside the box"""
+    return list(
+        queryset.filter(bbox_filter(min_lat, min_lng, max_lat, max_lng)).values_list('id', flat=True)
+    )
+
+
+def places_within(queryset, latitude, longitude, radius_km):
+    """IDs of places within radius_km of the point"""
+    candidates = queryset.filter(
+        bbox_filter(*radius_bbox(latitude, longitude, radius_km))
+    ).values_list('id', 'latitude', 'longitude')
+    return [
+        place_id for place_id, lat, lng in candidates
+        if distance_km(latitude, longitude, float(lat), float(lng)) <= radius_km
+    ]
@@ -0,0 +1,201 @@
+"""
+Streaming ingest helpers
+
+Uploaded bytes are fingerprinted while they are written to storage and the
+image is probed from its header only, so the processing worker never has to
+re-read an original just to hash or measure it.
+"""
+from django.conf import settings
+from django.utils import timezone
+import hashlib
+import os
+import uuid
+import pyvips
+
+# libvips loader -> MIME type
+LOADER_MIME_TYPES = {
+    'jpegload': 'image/jpeg',
+    'pngload': 'image/png',
+    'webpload': 'image/webp',
+    'tiffload': 'image/tiff',
+    'gifload': 'image/gif',
+    'heifload': 'image/heif',
+    'jp2kload': 'image/jp2',
+}
+
+
+def build_upload_path(user_id, original_filename):
+    """Relative storage path for a newly uploaded original"""
+    now = timezone.now()
+    filename = f"{uuid.uuid4()}_{original_filename}"
+    return os.path.join(
+        str(now.year),
+        f"{now.month:02d}",
+        f"user_{user_id}",
+        filename
+    )
+
+
+def is_zip_filename(filename):
+    """Whether an upload should go through bulk ZIP ingest"""
+    return filename.lower().endswith('.zip')
+
+
+class IncrementalHasher:
+    """MD5 (plus an optional secondary hash) fed chunk by chunk"""
+
+    def __init__(self, secondary=None):
+        self.md5 = hashlib.md5()
+        secondary = settings.UPLOAD_SECONDARY_HASH if secondary is None else secondary
+        self.secondary = hashlib.new(secondary) if secondary else None
+        self.size = 0
+
+    def update(self, chunk):
+        self.md5.update(chunk)
+        if self.secondary is not None:
+            self.secondary.update(chunk)
+        self.size += len(chunk)
+
+    def result(self):
+        return {
+            'md5': self.md5.hexdigest(),
+            'secondary_hash': self.secondary.hexdigest() if self.secondary is not None else '',
+            'filesize': self.size,
+        }
+
+
+def write_chunks(chunks, full_path):
+    """
+    Write an iterable of byte chunks to full_path, hashing as they go
+
+    Returns the hasher result (md5, secondary_hash, filesize).
+    """
+    hasher = IncrementalHasher()
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'wb+') as destination:
+        for chunk in chunks:
+            hasher.update(chunk)
+            destination.write(chunk)
+    return hasher.result()
+
+
+def probe_image(full_path):
+    """
+    Read width, height and MIME type from the image header
+
+    pyvips only parses the header until pixels are requested, so this does
+    not decode the image.
+    """
+    vips_image = pyvips.Image.new_from_file(full_path)
+    try:
+        loader = vips_image.get('vips-loader')
+    except pyvips.Error:
+        loader = ''
+    return {
+        'width': vips_image.width,
+        'height': vips_image.height,
+        'mime_type': LOADER_MIME_TYPES.get(loader, 'application/octet-stream'),
+    }
+
+
+def place_uploaded_file(uploaded_file, full_path):
+    """
+    Move an upload streamed by HashingFileUploadHandler into place
+
+    The temp file lives on the STORAGE_ROOT filesystem, so this is an atomic
+    rename rather than a copy.
+    """
+    uploaded_file.file.flush()
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    os.rename(uploaded_file.temporary_file_path(), full_path)
+    if settings.FILE_UPLOAD_PERMISSIONS is not None:
+        os.chmod(full_path, settings.FILE_UPLOAD_PERMISSIONS)
+    return dict(uploaded_file.ingest)
+
+
+def ingest_uploaded_file(uploaded_file, full_path):
+    """
+    Store an uploaded file at full_path and return its fingerprint and
+    header probe, ready to be stored on an UploadTask
+    """
+    if getattr(uploaded_file, 'ingest', None) is not None:
+        result = place_uploaded_file(uploaded_file, full_path)
+    else:
+        result = write_chunks(uploaded_file.chunks(), full_path)
+    return probe_result(result, full_path)
+
+
+def probe_result(result, full_path):
+    """Add the header probe to an ingest result when libvips can read it"""
+    try:
+        result.update(probe_image(full_path))
+    except pyvips.Error:
+        # Not an image libvips can read: let the worker report it
+        pass
+    return result
+
+
+def ingest_chunks(chunks, full_path):
+    """
+    Stream chunks to storage and return the fingerprint and header probe,
+    ready to be stored on an UploadTask
+    """
+    return probe_result(write_chunks(chunks, full_path), full_path)
+
+
+def preallocate_file(full_path, size):
+    """Create a file of the given size for out-of-order chunk writes"""
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'wb') as f:
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except (AttributeError, OSError):
+            # Filesystem without fallocate support: sparse file instead
+            f.truncate(size)
+
+
+def write_range(full_path, stream, offset, length, block_size=65536):
+    """
+    Copy length bytes from a readable stream into full_path at offset
+
+    Returns the MD5 of the written bytes so the chunk can be verified
+    against a client-supplied Content-MD5.
+    """
+    chunk_md5 = hashlib.md5()
+    remaining = length
+    fd = os.open(full_path, os.O_WRONLY)
+    try:
+        position = offset
+        while remaining > 0:
+            data = stream.read(min(block_size, remaining))
+            if not data:
+                break
+            chunk_md5.update(data)
+            os.pwrite(fd, data, position)
+            position += len(data)
+            remaining -= len(data)
+    finally:
+        os.close(fd)
+    if remaining:
+        raise ValueError(f"Chunk truncated: {remaining} bytes missing")
+    return chunk_md5.hexdigest()
+
+
+def merge_range(ranges, start, end):
+    """Merge [start, end) into a sorted list of disjoint [start, end) ranges"""
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+def hash_file(full_path, block_size=1048576):
+    """Fingerprint an assembled file in one sequential pass"""
+    hasher = IncrementalHasher()
+    with open(full_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block_size), b''):
+            hasher.update(chunk)
+    return hasher.result()
@@ -0,0 +1,127 @@
+"""
+Normalized keyword index
+
+ImageMetadata.keywords stays the editable JSON list; image_keywords holds
+one (image, language, keyword) row per normalized keyword so keyword
+filters and counts are index lookups instead of JSON scans. Rows are kept
+in sync by statement-level triggers on image_metadata, the same way the
+search vectors are.
+"""
+from django.db import connection, connections
+from django.db.models import Count, Exists, OuterRef
+from .models import ImageKeyword
+
+# btrim() only strips spaces; tabs, newlines and NBSPs must go too, like str.split()
+TRIM_SQL = "regexp_replace({value}, '^\\s+|\\s+$', '', 'g')"
+
+# Keyword normalization shared by SQL and Python (see normalize_keyword)
+NORMALIZE_SQL = "left(lower(regexp_replace(" + TRIM_SQL + ", '\\s+', ' ', 'g')), 255)"
+
+# {where} selects the metadata rows to index (alias m)
+INSERT_SQL = """
+INSERT INTO image_keywords (image_id, language, keyword)
+SELECT DISTINCT m.image_id, m.language, """ + NORMALIZE_SQL.format(value='k.value') + """
+  FROM image_metadata AS m
+ CROSS JOIN LATERAL jsonb_array_elements_text(
+       CASE WHEN jsonb_typeof(m.keywords) = 'array' THEN m.keywords ELSE '[]'::jsonb END
+ ) AS k(value)
+ WHERE {where} AND k.value ~ '\\S'
+ON CONFLICT DO NOTHING
+"""
+
+REFRESH_FUNCTION = """
+CREATE OR REPLACE FUNCTION images_refresh_keywords(target_ids bigint[])
+RETURNS void AS $$
+    DELETE FROM image_keywords WHERE image_id = ANY(target_ids);
+""" + INSERT_SQL.format(where='m.image_id = ANY(target_ids)') + """;
+$$ LANGUAGE sql;
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION image_metadata_keywords_trigger()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM images_refresh_keywords(ARRAY(SELECT DISTINCT image_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM images_refresh_keywords(ARRAY(
+            SELECT image_id FROM new_rows UNION SELECT image_id FROM old_rows
+        ));
+    ELSE
+        PERFORM images_refresh_keywords(ARRAY(SELECT DISTINCT image_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS = """
+DROP TRIGGER IF EXISTS image_metadata_keywords_insert ON image_metadata;
+CREATE TRIGGER image_metadata_keywords_insert
+    AFTER INSERT ON image_metadata
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION image_metadata_keywords_trigger();
+
+DROP TRIGGER IF EXISTS image_metadata_keywords_update ON image_metadata;
+CREATE TRIGGER image_metadata_keywords_update
+    AFTER UPDATE ON image_metadata
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION image_metadata_keywords_trigger();
+
+DROP TRIGGER IF EXISTS image_metadata_keywords_delete ON image_metadata;
+CREATE TRIGGER image_metadata_keywords_delete
+    AFTER DELETE ON image_metadata
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION image_metadata_keywords_trigger();
+"""
+
+
+def install_keyword_triggers(sender=None, using='default', **kwargs):
+    """Create/refresh the keyword index function and triggers (post_migrate)"""
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(REFRESH_FUNCTION)
+        cursor.execute(TRIGGER_FUNCTION)
+        cursor.execute(TRIGGERS)
+
+
+def normalize_keyword(keyword):
+    """Python twin of NORMALIZE_SQL"""
+    return ' '.join(keyword.split()).lower()[:255]
+
+
+def rebuild_keywords_range(start_id, end_id):
+    """Re-index keywords of images with start_id <= id < end_id; returns rows inserted"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM image_keywords WHERE image_id >= %s AND image_id < %s',
+            [start_id, end_id]
+        )
+        cursor.execute(
+            INSERT_SQL.format(where='m.image_id >= %s AND m.image_id < %s'),
+            [start_id, end_id]
+        )
+        return cursor.rowcount
+
+
+def keyword_filter(keyword, language=None):
+    """EXISTS condition for images tagged with keyword (no join duplicates)"""
+    entries = ImageKeyword.objects.filter(image=OuterRef('pk'), keyword=normalize_keyword(keyword))
+    if language:
+        entries = entries.filter(language=language)
+    return Exists(entries)
+
+
+def count_keywords(images, language=None, limit=50):
+    """Most used keywords among the given images queryset"""
+    entries = ImageKeyword.objects.filter(image__in=images.order_by().values('pk'))
+    if language:
+        entries = entries.filter(language=language)
+    rows = (
+        entries.values('keyword')
+        .annotate(count=Count('image_id', distinct=True))
+        .order_by('-count', 'keyword')[:limit]
+    )
+    return [{'keyword': row['keyword'], 'count': row['count']} for row in rows]
@@ -0,0 +1,43 @@
+"""
+Fill Image.derivatives_summary from existing ImageDerivative rows
+"""
+from django.core.management.base import BaseCommand
+from images.models import Image, ImageDerivative
+
+
+class Command(BaseCommand):
+    help = 'Backfill the denormalized derivatives summary on images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Images updated per batch')
+        parser.add_argument('--all', action='store_true', help='Rebuild images that already have a summary')
+
+    def handle(self, *args, **options):
+        queryset = Image.objects.order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(derivatives_summary={})
+
+        batch_size = options['batch_size']
+        updated = 0
+        last_id = 0
+        while True:
+            images = list(queryset.filter(id__gt=last_id).only('id')[:batch_size])
+            if not images:
+                break
+            last_id = images[-1].id
+
+            summaries = {image.id: {} for image in images}
+            derivatives = ImageDerivative.objects.filter(image_id__in=summaries).values_list(
+                'image_id', 'kind', 'file_path', 'width', 'height'
+            )
+            for image_id, kind, file_path, width, height in derivatives:
+                summaries[image_id][kind] = {'path': file_path, 'width': width, 'height': height}
+
+            for image in images:
+                image.derivatives_summary = summaries[image.id]
+            Image.objects.bulk_update(images, ['derivatives_summary'])
+
+            updated += len(images)
+            self.stdout.write(f"{updated} images updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} images"))
@@ -0,0 +1,17 @@
+"""
+Compute Place.geohash for places saved before geohashes were stored
+"""
+from django.core.management.base import BaseCommand
+from images.geo import encode
+from images.models import Place
+
+
+class Command(BaseCommand):
+    help = 'Backfill geohashes from place coordinates'
+
+    def handle(self, *args, **options):
+        places = list(Place.objects.filter(latitude__isnull=False, longitude__isnull=False))
+        for place in places:
+            place.geohash = encode(float(place.latitude), float(place.longitude))
+        Place.objects.bulk_update(places, ['geohash'], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"Updated {len(places)} places"))
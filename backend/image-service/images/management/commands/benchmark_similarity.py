@@ -0,0 +1,66 @@
+"""
+Compare LSH similar-image lookups with an exact brute-force Jaccard scan
+
+Recall@k is the share of the exact top-k (by Jaccard over feature sets)
+that the LSH lookup also returns; latency is measured per query for both.
+"""
+from django.core.management.base import BaseCommand
+from images.models import ImageSignature
+from images.similarity import exact_jaccard, find_similar, load_features
+import random
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark LSH similar-images recall and latency against brute-force Jaccard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=100, help='Sampled query images')
+        parser.add_argument('--k', type=int, default=12, help='Results per query')
+        parser.add_argument('--seed', type=int, default=1, help='Sampling seed')
+
+    def handle(self, *args, **options):
+        image_ids = list(ImageSignature.objects.values_list('image_id', flat=True))
+        if not image_ids:
+            self.stdout.write('No signatures; run rebuild_image_signatures first')
+            return
+
+        # The baseline holds every feature set in memory, as a brute-force scan would
+        load_started = time.monotonic()
+        features = load_features(image_ids)
+        load_time = time.monotonic() - load_started
+
+        k = options['k']
+        sample = random.Random(options['seed']).sample(image_ids, min(options['queries'], len(image_ids)))
+        recalls = []
+        lsh_times = []
+        exact_times = []
+
+        for image_id in sample:
+            started = time.monotonic()
+            scores = [
+                (other_id, exact_jaccard(features[image_id], tokens))
+                for other_id, tokens in features.items() if other_id != image_id
+            ]
+            scores.sort(key=lambda item: (-item[1], item[0]))
+            exact = {other_id for other_id, score in scores[:k] if score > 0}
+            exact_times.append(time.monotonic() - started)
+
+            started = time.monotonic()
+            found = {other_id for other_id, _ in find_similar(image_id, limit=k)}
+            lsh_times.append(time.monotonic() - started)
+
+            if exact:
+                recalls.append(len(found & exact) / len(exact))
+
+        def ms(values):
+            return f"median {statistics.median(values) * 1000:.1f} ms, max {max(values) * 1000:.1f} ms"
+
+        self.stdout.write(f"Images: {len(image_ids)}, queries: {len(sample)}, k: {k}")
+        self.stdout.write(f"Brute force: {ms(exact_times)} (+ {load_time:.1f}s to load feature sets)")
+        self.stdout.write(f"LSH: {ms(lsh_times)}")
+        if recalls:
+            self.stdout.write(self.style.SUCCESS(
+                f"Recall@{k}: {statistics.mean(recalls):.3f} over {len(recalls)} queries"
+            ))
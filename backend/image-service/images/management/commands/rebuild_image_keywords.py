@@ -0,0 +1,37 @@
+"""
+Rebuild the normalized image_keywords index from ImageMetadata.keywords
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from images.models import Image
+from images.keywords import install_keyword_triggers, rebuild_keywords_range
+
+
+class Command(BaseCommand):
+    help = 'Rebuild image_keywords with set-based statements over image ID ranges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--range-size', type=int, default=10000, help='Image IDs per statement')
+        parser.add_argument(
+            '--skip-install', action='store_true',
+            help='Do not (re)install the keyword SQL function and triggers first'
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_install']:
+            install_keyword_triggers()
+
+        bounds = Image.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No images to index')
+            return
+
+        range_size = options['range_size']
+        inserted = 0
+        for low in range(bounds['low'], bounds['high'] + 1, range_size):
+            with transaction.atomic():
+                inserted += rebuild_keywords_range(low, low + range_size)
+            self.stdout.write(f"Indexed images up to {min(low + range_size - 1, bounds['high'])}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {inserted} keyword entries"))
@@ -0,0 +1,30 @@
+"""
+Compute MinHash/LSH similarity signatures for every image
+"""
+from django.core.management.base import BaseCommand
+from images.models import Image
+from images.similarity import analyze_signatures, update_signatures
+
+
+class Command(BaseCommand):
+    help = 'Rebuild similarity signatures in batches of image IDs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Images per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        written = 0
+        last_id = 0
+        while True:
+            image_ids = list(
+                Image.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not image_ids:
+                break
+            last_id = image_ids[-1]
+            written += update_signatures(image_ids)
+            self.stdout.write(f"{written} signatures written (up to image {last_id})")
+
+        analyze_signatures()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} signatures"))
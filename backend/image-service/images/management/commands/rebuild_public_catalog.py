@@ -0,0 +1,45 @@
+"""
+Rebuild the public_catalog read model from images and their metadata
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from images.models import CatalogEntry, Image
+from images.catalog import install_catalog_function, refresh_catalog_range
+from images.search_cache import bump_catalog_generation
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized public catalog over image ID ranges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--range-size', type=int, default=10000, help='Image IDs per statement')
+        parser.add_argument(
+            '--skip-install', action='store_true',
+            help='Do not (re)install the catalog SQL function first'
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_install']:
+            install_catalog_function()
+
+        # Drop rows whose image disappeared outside the ORM
+        orphans = CatalogEntry.objects.exclude(image_id__in=Image.objects.values('id')).delete()[0]
+
+        bounds = Image.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No images to catalog')
+            return
+
+        range_size = options['range_size']
+        upserted = 0
+        for low in range(bounds['low'], bounds['high'] + 1, range_size):
+            with transaction.atomic():
+                upserted += refresh_catalog_range(low, low + range_size)
+            self.stdout.write(f"Cataloged images up to {min(low + range_size - 1, bounds['high'])}")
+
+        bump_catalog_generation()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {upserted} catalog rows ({orphans} orphans removed)"
+        ))
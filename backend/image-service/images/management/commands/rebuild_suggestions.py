@@ -0,0 +1,75 @@
+"""
+Rebuild the autocomplete vocabulary from published metadata and taxonomy
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from images.keywords import TRIM_SQL
+from images.models import Category, Topic, Place, SuggestionTerm
+from images.suggestions import install_trigram_index, normalize_term, reset_index
+
+KEYWORD = TRIM_SQL.format(value='keyword')
+TITLE = TRIM_SQL.format(value='m.title')
+
+KEYWORDS_SQL = f"""
+SELECT {KEYWORD}, count(DISTINCT m.image_id)
+  FROM image_metadata AS m
+  JOIN images AS i ON i.id = m.image_id AND i.status = 'published'
+ CROSS JOIN LATERAL jsonb_array_elements_text(
+       CASE WHEN jsonb_typeof(m.keywords) = 'array' THEN m.keywords ELSE '[]'::jsonb END
+ ) AS keyword
+ WHERE keyword ~ '\\S'
+ GROUP BY {KEYWORD}
+"""
+
+TITLES_SQL = f"""
+SELECT {TITLE}, count(DISTINCT m.image_id)
+  FROM image_metadata AS m
+  JOIN images AS i ON i.id = m.image_id AND i.status = 'published'
+ WHERE m.title ~ '\\S'
+ GROUP BY {TITLE}
+"""
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the suggestion_terms vocabulary used by autocomplete'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Terms inserted per batch')
+
+    def collect(self, terms, kind, rows):
+        for text, weight in rows:
+            text = ' '.join(text.split())[:500]
+            if not text:
+                continue
+            key = (normalize_term(text), kind)
+            current = terms.get(key)
+            if current is None:
+                terms[key] = [text, weight]
+            else:
+                current[1] += weight
+
+    def handle(self, *args, **options):
+        install_trigram_index()
+
+        terms = {}
+        with connection.cursor() as cursor:
+            cursor.execute(KEYWORDS_SQL)
+            self.collect(terms, 'keyword', cursor.fetchall())
+            cursor.execute(TITLES_SQL)
+            self.collect(terms, 'title', cursor.fetchall())
+
+        for model, kind in ((Category, 'category'), (Topic, 'topic'), (Place, 'place')):
+            names = model.objects.filter(is_active=True).values_list('name', flat=True)
+            self.collect(terms, kind, ((name, 1) for name in names))
+
+        rows = [
+            SuggestionTerm(normalized=normalized, kind=kind, text=text, weight=weight)
+            for (normalized, kind), (text, weight) in terms.items()
+        ]
+        with transaction.atomic():
+            SuggestionTerm.objects.all().delete()
+            SuggestionTerm.objects.bulk_create(rows, batch_size=options['batch_size'])
+
+        reset_index()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} suggestion terms"))
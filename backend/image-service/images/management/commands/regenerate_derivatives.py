@@ -0,0 +1,180 @@
+"""
+Rebuild image derivatives for the existing catalog on a local process pool
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_datetime, parse_date
+from multiprocessing import Pool
+import json
+import os
+import time
+from images.catalog import refresh_catalog
+from images.models import Image, ImageDerivative
+from images.search_cache import bump_catalog_generation
+from images.tasks import create_derivatives, get_derivative_spec_version
+
+DERIVATIVE_KINDS = ['thumbnail', 'preview', 'medium']
+
+
+def _init_worker():
+    """Make sure each worker opens its own database connection"""
+    connections.close_all()
+
+
+def _regenerate(image_id):
+    """Rebuild the derivatives of one image in the worker process"""
+    # The parent refreshes the catalog per batch and bumps the search cache once
+    result = create_derivatives(image_id, refresh_catalog=False)
+    return image_id, result.get('success', False), result.get('error', '')
+
+
+def _parse_when(value):
+    """Parse a date or datetime option"""
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise CommandError(f"Invalid date: {value}")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Regenerate thumbnail/preview/medium derivatives for existing images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='append', help='Only images with this status (repeatable)')
+        parser.add_argument('--created-from', help='Only images created on/after this date')
+        parser.add_argument('--created-to', help='Only images created on/before this date')
+        parser.add_argument(
+            '--missing', default='',
+            help=f"Select images missing any of these kinds (comma separated: {','.join(DERIVATIVE_KINDS)})"
+        )
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='Select images with derivatives rendered under an older spec version'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=500, help='IDs read from the cursor per batch')
+        parser.add_argument('--checkpoint', help='Checkpoint file used to resume an interrupted run')
+        parser.add_argument('--limit', type=int, help='Stop after this many images')
+        parser.add_argument('--count', action='store_true', help='Count matching images first (enables ETA)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many images match')
+
+    def get_queryset(self, options):
+        queryset = Image.objects.all()
+
+        if options['status']:
+            queryset = queryset.filter(status__in=options['status'])
+        if options['created_from']:
+            queryset = queryset.filter(created_at__gte=_parse_when(options['created_from']))
+        if options['created_to']:
+            queryset = queryset.filter(created_at__lte=_parse_when(options['created_to']))
+
+        # Images needing work: missing any requested kind, or rendered under an old spec
+        needs_work = Q()
+        missing = [kind.strip() for kind in options['missing'].split(',') if kind.strip()]
+        for kind in missing:
+            if kind not in DERIVATIVE_KINDS:
+                raise CommandError(f"Unknown derivative kind: {kind}")
+            needs_work |= ~Exists(
+                ImageDerivative.objects.filter(image=OuterRef('pk'), kind=kind)
+            )
+        if options['stale']:
+            needs_work |= Exists(
+                ImageDerivative.objects.filter(image=OuterRef('pk'), kind__in=DERIVATIVE_KINDS)
+                .exclude(spec_version=get_derivative_spec_version())
+            )
+        if needs_work:
+            queryset = queryset.filter(needs_work)
+
+        return queryset
+
+    def load_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return {'last_id': 0, 'processed': 0, 'failed': 0}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, path, checkpoint):
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+
+    def handle(self, *args, **options):
+        checkpoint = self.load_checkpoint(options['checkpoint'])
+        queryset = self.get_queryset(options).filter(id__gt=checkpoint['last_id']).order_by('id')
+
+        total = queryset.count() if options['count'] or options['dry_run'] else None
+        if options['limit'] is not None and total is not None:
+            total = min(total, options['limit'])
+        if options['dry_run']:
+            self.stdout.write(f"{total} images match")
+            return
+        if checkpoint['last_id']:
+            self.stdout.write(
+                f"Resuming after image {checkpoint['last_id']} "
+                f"({checkpoint['processed']} already processed)"
+            )
+
+        # Children must not inherit the parent's open connection
+        connections.close_all()
+
+        processed = failed = 0
+        started = time.monotonic()
+        ids = queryset.values_list('id', flat=True).iterator(chunk_size=options['batch_size'])
+
+        with Pool(processes=options['workers'], initializer=_init_worker) as pool:
+            while True:
+                batch = []
+                for image_id in ids:
+                    batch.append(image_id)
+                    if len(batch) >= options['batch_size']:
+                        break
+                if options['limit'] is not None:
+                    batch = batch[:max(options['limit'] - processed, 0)]
+                if not batch:
+                    break
+
+                batch_failed = 0
+                regenerated = []
+                chunksize = max(len(batch) // (options['workers'] * 4), 1)
+                for image_id, success, error in pool.imap_unordered(_regenerate, batch, chunksize=chunksize):
+                    if success:
+                        regenerated.append(image_id)
+                    else:
+                        batch_failed += 1
+                        self.stderr.write(f"Image {image_id}: {error}")
+                refresh_catalog(
+                    Image.objects.filter(id__in=regenerated, status='published').values_list('id', flat=True)
+                )
+                processed += len(batch)
+                failed += batch_failed
+
+                # Every ID up to the end of the batch is done
+                checkpoint['last_id'] = batch[-1]
+                checkpoint['processed'] += len(batch)
+                checkpoint['failed'] += batch_failed
+                self.save_checkpoint(options['checkpoint'], checkpoint)
+                self.report(processed, failed, total, started)
+
+        if processed > failed:
+            bump_catalog_generation()
+
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Regenerated {processed - failed} images ({failed} failed) "
+            f"in {elapsed:.1f}s, {rate:.1f} images/s"
+        ))
+
+    def report(self, processed, failed, total, started):
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        line = f"{processed} processed, {failed} failed, {rate:.1f} images/s"
+        if total:
+            remaining = max(total - processed, 0)
+            eta = remaining / rate if rate else 0
+            line = f"{processed}/{total} ({processed * 100 // total}%) - " + line + f", ETA {eta:.0f}s"
+        self.stdout.write(line)
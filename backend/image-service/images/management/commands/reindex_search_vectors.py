@@ -0,0 +1,78 @@
+"""
+Rebuild search vectors for the catalog with set-based UPDATEs over ID ranges
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from images.models import Image
+from images.search_cache import bump_catalog_generation
+from images.search_vectors import install_search_triggers, refresh_search_vectors_range
+from images.catalog import refresh_catalog_range
+
+
+def _refresh_range(start_id, end_id):
+    """Run one range UPDATE on this thread's own connection"""
+    try:
+        rows = refresh_search_vectors_range(start_id, end_id)
+        # The public catalog carries copies of the vectors
+        refresh_catalog_range(start_id, end_id)
+        return start_id, rows
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild image search vectors with batched UPDATE ... FROM statements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--range-size', type=int, default=10000, help='Image IDs per UPDATE')
+        parser.add_argument('--workers', type=int, default=4, help='Ranges updated concurrently')
+        parser.add_argument('--start-id', type=int, help='First image ID (default: lowest)')
+        parser.add_argument('--end-id', type=int, help='Last image ID (default: highest)')
+        parser.add_argument(
+            '--skip-install', action='store_true',
+            help='Do not (re)install the search SQL functions first'
+        )
+
+    def handle(self, *args, **options):
+        # Pick up text-search config changes before rebuilding
+        if not options['skip_install']:
+            install_search_triggers()
+
+        bounds = Image.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No images to index')
+            return
+
+        start_id = options['start_id'] if options['start_id'] is not None else bounds['low']
+        end_id = options['end_id'] if options['end_id'] is not None else bounds['high']
+        range_size = options['range_size']
+        ranges = [
+            (low, min(low + range_size, end_id + 1))
+            for low in range(start_id, end_id + 1, range_size)
+        ]
+
+        connection.close()
+        started = time.monotonic()
+        updated = done = 0
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(_refresh_range, low, high) for low, high in ranges]
+            for future in as_completed(futures):
+                _, rows = future.result()
+                updated += rows
+                done += 1
+                elapsed = time.monotonic() - started
+                rate = updated / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"{done}/{len(ranges)} ranges, {updated} images, {rate:.0f} images/s"
+                )
+
+        bump_catalog_generation()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Reindexed {updated} images in {elapsed:.1f}s"
+        ))
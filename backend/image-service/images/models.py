@@ -1,12 +1,17 @@
 """
 Image models for image service
 """
+from django.conf import settings
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
 import hashlib
 import os
-from datetime import datetime
+import uuid
+from django.utils import timezone
+from datetime import datetime, timedelta
+from .geo import encode as geohash_encode
 
 
 class Category(models.Model):
@@ -80,6 +85,7 @@ class Place(models.Model):
     type = models.CharField(max_length=20, choices=PLACE_TYPES, default='custom')
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, editable=False)  # Set from coordinates on save
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -87,10 +93,23 @@ class Place(models.Model):
     class Meta:
         db_table = 'places'
         ordering = ['name']
+        indexes = [
+            # Prefix (LIKE 'abc%') scans for map and radius search
+            models.Index(fields=['geohash'], opclasses=['varchar_pattern_ops'], name='places_geohash_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
 
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+        else:
+            self.geohash = ''
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'geohash'}
+        super().save(*args, **kwargs)
+
 
 class Image(models.Model):
     """Main image model"""
@@ -139,8 +158,15 @@ class Image(models.Model):
     topics = models.ManyToManyField(Topic, related_name='images', blank=True)
     places = models.ManyToManyField(Place, related_name='images', blank=True)
     
-    # Search
+    # Search (maintained in SQL by images.search_vectors triggers)
     search_vector = SearchVectorField(null=True)
+    search_vector_en = SearchVectorField(null=True)
+    search_vector_fr = SearchVectorField(null=True)
+    search_vector_ar = SearchVectorField(null=True)
+
+    # Denormalized {kind: {path, width, height}} kept in sync with ImageDerivative,
+    # so list pages don't query derivatives per row
+    derivatives_summary = models.JSONField(default=dict, blank=True)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -163,7 +189,13 @@ class Image(models.Model):
             models.Index(fields=['md5']),
             models.Index(fields=['created_at']),
             models.Index(fields=['published_at']),
+            # Keyset pagination orderings
+            models.Index(fields=['-created_at', 'id'], name='images_created_keyset_idx'),
+            models.Index(fields=['status', '-published_at', 'id'], name='images_published_keyset_idx'),
             GinIndex(fields=['search_vector']),
+            GinIndex(fields=['search_vector_en']),
+            GinIndex(fields=['search_vector_fr']),
+            GinIndex(fields=['search_vector_ar']),
         ]
 
     def __str__(self):
@@ -187,6 +219,25 @@ class Image(models.Model):
                 hash_md5.update(chunk)
         return hash_md5.hexdigest()
 
+    def record_derivative(self, kind, file_path, width, height):
+        """Merge one derivative into derivatives_summary (atomic jsonb concat)"""
+        entry = {'path': file_path, 'width': width, 'height': height}
+        Image.objects.filter(id=self.id).update(
+            derivatives_summary=models.Func(
+                models.F('derivatives_summary'),
+                models.Value({kind: entry}, output_field=models.JSONField()),
+                template='%(expressions)s',
+                arg_joiner=' || ',
+                output_field=models.JSONField(),
+            )
+        )
+        self.derivatives_summary = {**(self.derivatives_summary or {}), kind: entry}
+
+    def get_derivative_url(self, kind):
+        """Media URL of a derivative from the denormalized summary"""
+        entry = (self.derivatives_summary or {}).get(kind)
+        return f"/media/{entry['path']}" if entry else None
+
     def get_storage_path(self):
         """Get storage path for image"""
         date = self.created_at or datetime.now()
@@ -198,6 +249,71 @@ class Image(models.Model):
         )
 
 
+
+class CatalogEntry(models.Model):
+    """
+    Denormalized read model of a published image for the public catalog
+    (maintained in SQL by images.catalog)
+    """
+    image = models.OneToOneField(Image, on_delete=models.CASCADE, primary_key=True, related_name='catalog_entry')
+    filename = models.CharField(max_length=500)
+    type = models.CharField(max_length=20)
+    width = models.IntegerField()
+    height = models.IntegerField()
+    orientation = models.CharField(max_length=20)
+
+    # Taxonomy
+    category_id = models.IntegerField(null=True)
+    category_name = models.CharField(max_length=100, blank=True)
+    category_path = models.CharField(max_length=500, blank=True)  # "Parent > Child"
+    topic_ids = ArrayField(models.IntegerField(), default=list)
+    place_ids = ArrayField(models.IntegerField(), default=list)
+
+    # Copies of Image.derivatives_summary and per-language metadata titles
+    derivatives = models.JSONField(default=dict)
+    titles = models.JSONField(default=dict)  # {language: title}
+
+    search_vector = SearchVectorField(null=True)
+    search_vector_en = SearchVectorField(null=True)
+    search_vector_fr = SearchVectorField(null=True)
+    search_vector_ar = SearchVectorField(null=True)
+
+    # Stats
+    view_count = models.IntegerField(default=0)
+    purchase_count = models.IntegerField(default=0)
+    popularity = models.IntegerField(default=0)  # views + 5 x downloads + 10 x purchases
+
+    created_at = models.DateTimeField()
+    published_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'public_catalog'
+        ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['-published_at', 'image'], name='public_catalog_keyset_idx'),
+            models.Index(fields=['category_id']),
+            models.Index(fields=['type']),
+            models.Index(fields=['orientation']),
+            GinIndex(fields=['topic_ids']),
+            GinIndex(fields=['place_ids']),
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['search_vector_en']),
+            GinIndex(fields=['search_vector_fr']),
+            GinIndex(fields=['search_vector_ar']),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def status(self):
+        return 'published'
+
+    def get_derivative_url(self, kind):
+        """Media URL of a derivative from the copied summary"""
+        entry = (self.derivatives or {}).get(kind)
+        return f"/media/{entry['path']}" if entry else None
+
 class ImageDerivative(models.Model):
     """Image derivatives (thumbnails, previews, etc.)"""
     DERIVATIVE_KINDS = [
@@ -214,6 +330,7 @@ class ImageDerivative(models.Model):
     height = models.IntegerField()
     filesize = models.BigIntegerField()
     is_watermarked = models.BooleanField(default=False)
+    spec_version = models.CharField(max_length=32, blank=True)  # Settings fingerprint used to render it
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -263,6 +380,23 @@ class ImageMetadata(models.Model):
         return f"{self.title} ({self.language})"
 
 
+class ImageKeyword(models.Model):
+    """Normalized keyword entries, maintained from ImageMetadata.keywords by triggers"""
+    image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name='keyword_entries')
+    language = models.CharField(max_length=5)
+    keyword = models.CharField(max_length=255)  # Lowercased, whitespace collapsed
+
+    class Meta:
+        db_table = 'image_keywords'
+        unique_together = ['image', 'language', 'keyword']
+        indexes = [
+            models.Index(fields=['keyword', 'language'], name='image_keywords_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.keyword} ({self.language})"
+
+
 class Review(models.Model):
     """Review records for image validation"""
     STATUS_CHOICES = [
@@ -292,6 +426,48 @@ class Review(models.Model):
         return f"Review of {self.image.filename} by {self.reviewer_email} - {self.status}"
 
 
+class BulkIngest(models.Model):
+    """Aggregated progress of a ZIP archive ingest"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('extracting', 'Extracting'),
+        ('processing', 'Processing Derivatives'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    uploader_id = models.IntegerField(db_index=True)
+    uploader_email = models.EmailField(blank=True)
+    type = models.CharField(max_length=20, choices=Image.IMAGE_TYPES, default='photo')
+    original_filename = models.CharField(max_length=500)
+    file_path = models.CharField(max_length=1000)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error_message = models.TextField(blank=True)
+
+    # Progress counters
+    total_entries = models.IntegerField(default=0)
+    processed_entries = models.IntegerField(default=0)
+    created_images = models.IntegerField(default=0)
+    duplicate_entries = models.IntegerField(default=0)
+    failed_entries = models.IntegerField(default=0)
+    derivatives_completed = models.IntegerField(default=0)
+    derivatives_failed = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'bulk_ingests'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['uploader_id']),
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"{self.original_filename} - {self.status}"
+
+
 class UploadTask(models.Model):
     """Track upload tasks for async processing"""
     STATUS_CHOICES = [
@@ -307,6 +483,17 @@ class UploadTask(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     error_message = models.TextField(blank=True)
     image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True)
+    bulk_ingest = models.ForeignKey(
+        BulkIngest, on_delete=models.CASCADE, null=True, blank=True, related_name='upload_tasks'
+    )
+
+    # Fingerprint and header probe captured while the upload was streamed to disk
+    md5 = models.CharField(max_length=32, blank=True)
+    secondary_hash = models.CharField(max_length=128, blank=True)
+    filesize = models.BigIntegerField(null=True, blank=True)
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    mime_type = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
 
@@ -320,3 +507,100 @@ class UploadTask(models.Model):
 
     def __str__(self):
         return f"{self.original_filename} - {self.status}"
+
+
+def upload_session_expiry():
+    """Deadline of an open upload session; pushed back by every chunk"""
+    return timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+
+
+class UploadSession(models.Model):
+    """Resumable chunked upload, finalized into an UploadTask"""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('finalized', 'Finalized'),
+        ('aborted', 'Aborted'),
+        ('expired', 'Expired'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploader_id = models.IntegerField(db_index=True)
+    uploader_email = models.EmailField(blank=True)
+    original_filename = models.CharField(max_length=500)
+    type = models.CharField(max_length=20, choices=Image.IMAGE_TYPES, default='photo')
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    temp_path = models.CharField(max_length=1000)
+    expected_md5 = models.CharField(max_length=32, blank=True)  # Optional, verified on finalize
+    received_ranges = models.JSONField(default=list)  # Merged [start, end) byte ranges
+    received_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    upload_task = models.ForeignKey(UploadTask, on_delete=models.SET_NULL, null=True, blank=True)
+    bulk_ingest = models.ForeignKey(BulkIngest, on_delete=models.SET_NULL, null=True, blank=True)
+    expires_at = models.DateTimeField(default=upload_session_expiry)  # Open sessions past this are swept
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['uploader_id', 'status']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.original_filename} - {self.received_bytes}/{self.total_size}"
+
+    @property
+    def is_complete(self):
+        return self.received_ranges == [[0, self.total_size]]
+
+    @property
+    def offset(self):
+        """Number of contiguous bytes received from the start of the file"""
+        if self.received_ranges and self.received_ranges[0][0] == 0:
+            return self.received_ranges[0][1]
+        return 0
+
+
+class SuggestionTerm(models.Model):
+    """Distinct autocomplete vocabulary (keywords, titles, taxonomy names)"""
+    KIND_CHOICES = [
+        ('keyword', 'Keyword'),
+        ('title', 'Title'),
+        ('category', 'Category'),
+        ('topic', 'Topic'),
+        ('place', 'Place'),
+    ]
+
+    text = models.CharField(max_length=500)
+    normalized = models.CharField(max_length=500)  # Lowercased, accents stripped
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    weight = models.IntegerField(default=1)  # Number of published images using it
+
+    class Meta:
+        db_table = 'suggestion_terms'
+        unique_together = ['normalized', 'kind']
+        # Trigram index on normalized is created with pg_trgm by images.suggestions
+
+    def __str__(self):
+        return f"{self.text} ({self.kind})"
+
+
+class ImageSignature(models.Model):
+    """MinHash signature and LSH band hashes of an image's features (see images.similarity)"""
+    image = models.OneToOneField(Image, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    signature = ArrayField(models.BigIntegerField())
+    bands = ArrayField(models.BigIntegerField())
+    feature_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'image_signatures'
+        indexes = [
+            GinIndex(fields=['bands']),
+        ]
+
+    def __str__(self):
+        return f"Signature for image {self.image_id}"
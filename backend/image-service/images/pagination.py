@@ -0,0 +1,182 @@
+"""
+Pagination for image service
+
+Keyset (cursor) pagination over the queryset's own ordering: each page is
+an indexed range scan starting after the last row of the previous page,
+so there is no OFFSET and no COUNT(*) unless the client asks for one.
+"""
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+import json
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a compound ordering such as ('-created_at', 'id')
+
+    The ordering is taken from the queryset's order_by() (or the model's
+    default ordering), which must name plain fields or annotations; the
+    primary key is appended as the unique tie-breaker. Annotations must compare exactly
+    (no floats): round them to a DecimalField. Pass ?count=exact for an exact
+    total or ?count=estimate for the planner's row estimate.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        self.count = self.get_count(queryset, request)
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            values, reverse = cursor
+            queryset = queryset.filter(self.build_keyset_filter(values, reverse))
+        if reverse:
+            queryset = queryset.order_by(*[self.invert(field) for field in self.ordering])
+
+        # One extra row tells us whether there is a page beyond this one
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.first = rows[0] if rows else None
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_ordering(self, queryset):
+        """Queryset (or model default) ordering, with the primary key appended as tie-breaker"""
+        ordering = [str(field) for field in (queryset.query.order_by or queryset.model._meta.ordering)]
+        if not any(field.lstrip('-') in ('pk', queryset.model._meta.pk.name) for field in ordering):
+            ordering.append('pk')  # CatalogEntry's key is image_id, not id
+        return ordering
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return self.estimate_count(queryset)
+        return None
+
+    def estimate_count(self, queryset):
+        """Planner row estimate (no scan) for the filtered queryset"""
+        if queryset.query.is_empty():
+            return 0
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f"-{field}"
+
+    def build_keyset_filter(self, values, reverse):
+        """
+        Rows strictly after the cursor in ordering direction (before it when
+        paging backwards): (a > x) OR (a = x AND b > y) OR ...
+        """
+        keyset = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            keyset |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return keyset
+
+    def get_position(self, row):
+        position = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            if isinstance(value, datetime):
+                value = {'dt': value.isoformat()}
+            elif isinstance(value, Decimal):
+                # Exact, unlike a float round trip through JSON (e.g. a rounded search rank)
+                value = {'d': str(value)}
+            position.append(value)
+        return position
+
+    def encode_cursor(self, row, reverse):
+        token = json.dumps({'p': self.get_position(row), 'r': reverse}, separators=(',', ':'))
+        return b64encode(token.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = [self.decode_value(value) for value in token['p']]
+            if len(values) != len(self.ordering):
+                raise ValueError('Cursor does not match ordering')
+            return values, bool(token.get('r'))
+        except (TypeError, ValueError, KeyError, InvalidOperation):
+            raise NotFound('Invalid cursor')
+
+    @staticmethod
+    def decode_value(value):
+        if isinstance(value, dict):
+            if 'dt' in value:
+                return parse_datetime(value['dt'])
+            return Decimal(value['d'])
+        return value
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last, False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.first is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.first, True))
@@ -0,0 +1,119 @@
+"""
+Result cache for public catalog searches
+
+Pages are cached as ordered ID lists keyed by the normalized search
+parameters and a catalog generation counter. Bumping the generation when
+the public catalog changes makes every older entry unreachable at once;
+they simply expire with their TTL.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from datetime import date, datetime
+import hashlib
+import json
+from .models import CatalogEntry
+
+GENERATION_KEY = 'search:catalog_generation'
+
+# Roles that see more than the shared public catalog
+STAFF_ROLES = ['admin', 'photographer', 'infographiste', 'validator']
+
+# Query parameters that select the page window, besides the search filters
+PAGE_PARAMS = ['cursor', 'page_size', 'count']
+
+# List filters whose order is irrelevant; others (bbox=west,south,east,north) are positional
+SET_PARAMS = ['topic', 'place']
+
+
+def get_generation():
+    """Current catalog generation"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_catalog_generation():
+    """Invalidate every cached search in O(1)"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+
+
+def is_cacheable(request):
+    """Only the public catalog is shared between users"""
+    if not settings.SEARCH_CACHE_ENABLED:
+        return False
+    return request.META.get('HTTP_X_USER_ROLE', 'customer') not in STAFF_ROLES
+
+
+def normalize_value(value, unordered=False):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return ' '.join(value.lower().split())
+    if isinstance(value, (list, tuple)):
+        values = [normalize_value(item) for item in value]
+        return sorted(values) if unordered else values
+    return value
+
+
+def normalize_params(validated_data):
+    """Search filters as a canonical dict (no page window, no facets flag)"""
+    return {
+        key: normalize_value(value, unordered=key in SET_PARAMS)
+        for key, value in validated_data.items()
+        if value not in ('', None) and key != 'facets'
+    }
+
+
+def get_cache_key(validated_data, request):
+    """Cache key for a search page: generation + normalized parameters"""
+    params = normalize_params(validated_data)
+    for name in PAGE_PARAMS:
+        if request.query_params.get(name):
+            params[f"_{name}"] = request.query_params.get(name)
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f"search:{get_generation()}:{digest}"
+
+
+def get_facets_cache_key(validated_data, prefix='facets'):
+    """Cache key for facet counts: generation + filters (no page window)"""
+    params = normalize_params(validated_data)
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f"{prefix}:{get_generation()}:{digest}"
+
+
+def get_facets(cache_key):
+    """Cached facet counts or None"""
+    return cache.get(cache_key)
+
+
+def set_facets(cache_key, facets):
+    cache.set(cache_key, facets, timeout=settings.SEARCH_CACHE_TIMEOUT)
+
+
+def get_page(cache_key):
+    """Cached page ({'ids': [...], 'meta': {...}}) or None"""
+    return cache.get(cache_key)
+
+
+def set_page(cache_key, images, meta):
+    """Cache the ordered IDs of a page and its pagination links"""
+    cache.set(
+        cache_key,
+        {'ids': [image.pk for image in images], 'meta': meta},
+        timeout=settings.SEARCH_CACHE_TIMEOUT
+    )
+
+
+def load_images(ids):
+    """Fetch cached IDs from the public catalog in one query, preserving their order"""
+    images = CatalogEntry.objects.in_bulk(ids)
+    return [images[image_id] for image_id in ids if image_id in images]
@@ -0,0 +1,123 @@
+"""
+Database-maintained search vectors
+
+Each image gets one weighted tsvector per metadata language (title A,
+keywords B, caption C) plus the combined search_vector. They are computed
+in SQL: statement-level triggers on image_metadata refresh the affected
+images in one UPDATE, and the same UPDATE can be run over ID ranges to
+rebuild the catalog.
+"""
+from django.db import connection, connections
+
+# Metadata language -> (text search config, Image field)
+LANGUAGE_CONFIGS = {
+    'en': ('english', 'search_vector_en'),
+    'fr': ('french', 'search_vector_fr'),
+    'ar': ('simple', 'search_vector_ar'),  # no Arabic stemmer in core Postgres
+}
+
+METADATA_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION images_metadata_vector(cfg regconfig, title text, keywords jsonb, caption text)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector(cfg, coalesce(title, '')), 'A')
+        || setweight(to_tsvector(cfg, coalesce((
+               SELECT string_agg(keyword, ' ')
+                 FROM jsonb_array_elements_text(
+                      CASE WHEN jsonb_typeof(keywords) = 'array' THEN keywords ELSE '[]'::jsonb END
+                 ) AS keyword
+           ), '')), 'B')
+        || setweight(to_tsvector(cfg, coalesce(caption, '')), 'C')
+$$ LANGUAGE sql IMMUTABLE;
+"""
+
+# Set-based refresh; {where} selects the images to rebuild (alias t)
+REFRESH_SQL = """
+UPDATE images AS i SET
+    search_vector_en = v.en,
+    search_vector_fr = v.fr,
+    search_vector_ar = v.ar,
+    search_vector = setweight(to_tsvector('simple', coalesce(i.filename, '')), 'D') || v.en || v.fr || v.ar
+FROM (
+    SELECT t.id AS image_id,
+           coalesce(images_metadata_vector('english', en.title, en.keywords, en.caption), ''::tsvector) AS en,
+           coalesce(images_metadata_vector('french', fr.title, fr.keywords, fr.caption), ''::tsvector) AS fr,
+           coalesce(images_metadata_vector('simple', ar.title, ar.keywords, ar.caption), ''::tsvector) AS ar
+      FROM images AS t
+      LEFT JOIN image_metadata AS en ON en.image_id = t.id AND en.language = 'en'
+      LEFT JOIN image_metadata AS fr ON fr.image_id = t.id AND fr.language = 'fr'
+      LEFT JOIN image_metadata AS ar ON ar.image_id = t.id AND ar.language = 'ar'
+     WHERE {where}
+) AS v
+WHERE i.id = v.image_id
+"""
+
+REFRESH_FUNCTION = """
+CREATE OR REPLACE FUNCTION images_refresh_search_vectors(target_ids bigint[])
+RETURNS void AS $$
+""" + REFRESH_SQL.format(where='t.id = ANY(target_ids)') + """;
+$$ LANGUAGE sql;
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION images_metadata_search_trigger()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM images_refresh_search_vectors(ARRAY(SELECT DISTINCT image_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM images_refresh_search_vectors(ARRAY(
+            SELECT image_id FROM new_rows UNION SELECT image_id FROM old_rows
+        ));
+    ELSE
+        PERFORM images_refresh_search_vectors(ARRAY(SELECT DISTINCT image_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Transition tables need one trigger per event
+TRIGGERS = """
+DROP TRIGGER IF EXISTS image_metadata_search_insert ON image_metadata;
+CREATE TRIGGER image_metadata_search_insert
+    AFTER INSERT ON image_metadata
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION images_metadata_search_trigger();
+
+DROP TRIGGER IF EXISTS image_metadata_search_update ON image_metadata;
+CREATE TRIGGER image_metadata_search_update
+    AFTER UPDATE ON image_metadata
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION images_metadata_search_trigger();
+
+DROP TRIGGER IF EXISTS image_metadata_search_delete ON image_metadata;
+CREATE TRIGGER image_metadata_search_delete
+    AFTER DELETE ON image_metadata
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION images_metadata_search_trigger();
+"""
+
+
+def install_search_triggers(sender=None, using='default', **kwargs):
+    """Create/refresh the search SQL functions and triggers (post_migrate)"""
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(METADATA_VECTOR_FUNCTION)
+        cursor.execute(REFRESH_FUNCTION)
+        cursor.execute(TRIGGER_FUNCTION)
+        cursor.execute(TRIGGERS)
+
+
+def refresh_search_vectors(image_ids):
+    """Rebuild the vectors of the given images in one statement"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT images_refresh_search_vectors(%s::bigint[])', [list(image_ids)])
+
+
+def refresh_search_vectors_range(start_id, end_id):
+    """Rebuild the vectors of images with start_id <= id < end_id; returns rows updated"""
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_SQL.format(where='t.id >= %s AND t.id < %s'), [start_id, end_id])
+        return cursor.rowcount
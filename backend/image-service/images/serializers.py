@@ -4,7 +4,7 @@ Serializers for Image service
 from rest_framework import serializers
 from .models import (
     Category, Topic, Place, Image, ImageDerivative, 
-    ImageMetadata, Review, UploadTask
+    ImageMetadata, Review, UploadTask, UploadSession, BulkIngest, CatalogEntry
 )
 
 
@@ -101,12 +101,33 @@ class ImageListSerializer(serializers.ModelSerializer):
         ]
 
     def get_thumbnail_url(self, obj):
-        thumbnail = obj.derivatives.filter(kind='thumbnail').first()
-        return f"/media/{thumbnail.file_path}" if thumbnail else None
+        return obj.get_derivative_url('thumbnail')
 
     def get_preview_url(self, obj):
-        preview = obj.derivatives.filter(kind='preview').first()
-        return f"/media/{preview.file_path}" if preview else None
+        return obj.get_derivative_url('preview')
+
+
+class CatalogEntrySerializer(serializers.ModelSerializer):
+    """Public list rows from the catalog read model (same shape as ImageListSerializer)"""
+    id = serializers.IntegerField(source='pk', read_only=True)
+    status = serializers.CharField(read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CatalogEntry
+        fields = [
+            'id', 'filename', 'type', 'status', 'width', 'height', 'orientation',
+            'category_name', 'category_path', 'topic_ids', 'place_ids', 'titles',
+            'thumbnail_url', 'preview_url',
+            'view_count', 'purchase_count', 'created_at', 'published_at'
+        ]
+
+    def get_thumbnail_url(self, obj):
+        return obj.get_derivative_url('thumbnail')
+
+    def get_preview_url(self, obj):
+        return obj.get_derivative_url('preview')
 
 
 class ImageUploadSerializer(serializers.Serializer):
@@ -121,6 +142,17 @@ class ImageUploadSerializer(serializers.Serializer):
     keywords = serializers.ListField(child=serializers.CharField(), required=False)
 
 
+class DuplicateCheckItemSerializer(serializers.Serializer):
+    """Client-computed fingerprint of a file about to be uploaded"""
+    md5 = serializers.RegexField(r'^[0-9a-fA-F]{32}$')
+    size = serializers.IntegerField(required=False, min_value=0)
+
+
+class DuplicateCheckSerializer(serializers.Serializer):
+    """Serializer for pre-upload duplicate checks"""
+    files = DuplicateCheckItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+
 class ImageUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating image metadata"""
     topic_ids = serializers.ListField(child=serializers.IntegerField(), required=False, write_only=True)
@@ -174,12 +206,62 @@ class UploadTaskSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'status', 'error_message', 'created_at', 'finished_at']
 
 
+class BulkIngestSerializer(serializers.ModelSerializer):
+    """Serializer for BulkIngest progress"""
+    class Meta:
+        model = BulkIngest
+        exclude = ['file_path']
+        read_only_fields = [
+            'id', 'status', 'error_message', 'total_entries', 'processed_entries',
+            'created_images', 'duplicate_entries', 'failed_entries',
+            'derivatives_completed', 'derivatives_failed', 'created_at', 'finished_at'
+        ]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for UploadSession"""
+    offset = serializers.IntegerField(read_only=True)
+    is_complete = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'original_filename', 'type', 'total_size', 'chunk_size',
+            'received_ranges', 'received_bytes', 'offset', 'is_complete',
+            'status', 'upload_task', 'bulk_ingest', 'expires_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """Serializer for starting a resumable upload"""
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    type = serializers.ChoiceField(choices=['photo', 'infographie'], default='photo')
+    md5 = serializers.RegexField(r'^[0-9a-fA-F]{32}$', required=False)
+
+
+class IntegerListField(serializers.ListField):
+    """Comma-separated or repeated integer query parameter (?topic=1,2,3)"""
+    child = serializers.IntegerField(min_value=1)
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, int)):
+            data = [data]
+        values = [part.strip() for item in data for part in str(item).split(',') if part.strip()]
+        return sorted(set(super().to_internal_value(values)))
+
+
 class SearchSerializer(serializers.Serializer):
     """Serializer for search parameters"""
     q = serializers.CharField(required=False, allow_blank=True)
+    language = serializers.ChoiceField(choices=['en', 'fr', 'ar'], required=False)
     category = serializers.IntegerField(required=False)
-    topic = serializers.IntegerField(required=False)
-    place = serializers.IntegerField(required=False)
+    topic = IntegerListField(required=False, allow_empty=False, max_length=50)
+    topic_match = serializers.ChoiceField(choices=['any', 'all'], required=False, default='any')
+    place = IntegerListField(required=False, allow_empty=False, max_length=50)
+    place_match = serializers.ChoiceField(choices=['any', 'all'], required=False, default='any')
+    keyword = serializers.CharField(max_length=255, required=False)
     type = serializers.ChoiceField(choices=['photo', 'infographie'], required=False)
     orientation = serializers.ChoiceField(
         choices=['landscape', 'portrait', 'square'],
@@ -193,3 +275,45 @@ class SearchSerializer(serializers.Serializer):
     max_width = serializers.IntegerField(required=False)
     date_from = serializers.DateTimeField(required=False)
     date_to = serializers.DateTimeField(required=False)
+    facets = serializers.BooleanField(required=False, default=False)
+    # Geo: images whose places are within radius_km of (lat, lng) or inside
+    # bbox=west,south,east,north
+    lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(required=False, min_value=0.01, max_value=20000)
+    bbox = serializers.CharField(required=False)
+
+    def validate_bbox(self, value):
+        try:
+            west, south, east, north = [float(part) for part in value.split(',')]
+        except ValueError:
+            raise serializers.ValidationError('Expected bbox=west,south,east,north')
+        if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+            raise serializers.ValidationError('Bounding box out of range')
+        return [west, south, east, north]
+
+    def validate(self, data):
+        near = [name for name in ('lat', 'lng', 'radius_km') if name in data]
+        if near and len(near) != 3:
+            raise serializers.ValidationError('lat, lng and radius_km must be given together')
+        return data
+
+
+class MapPinsSerializer(SearchSerializer):
+    """Search filters for the map view; the viewport is required"""
+    bbox = serializers.CharField()
+
+
+class TopKeywordsSerializer(SearchSerializer):
+    """Search filters plus the size of the top-keywords list"""
+    limit = serializers.IntegerField(required=False, default=50, min_value=1, max_value=500)
+
+
+class SuggestionQuerySerializer(serializers.Serializer):
+    """Serializer for autocomplete parameters"""
+    q = serializers.CharField(max_length=100, trim_whitespace=True)
+    kind = serializers.MultipleChoiceField(
+        choices=['keyword', 'title', 'category', 'topic', 'place'],
+        required=False
+    )
+    limit = serializers.IntegerField(required=False, default=10, min_value=1, max_value=25)
@@ -0,0 +1,151 @@
+"""
+"More like this" with MinHash signatures and LSH banding
+
+An image's feature set is its normalized keywords (all languages), topics,
+places and category. Its MinHash signature estimates Jaccard similarity
+between feature sets: the fraction of equal positions in two signatures.
+The signature is cut into bands; images sharing at least one band hash
+are candidates, found with a GIN-indexed array overlap, so a query only
+compares against a few candidates instead of the whole catalog.
+"""
+from django.conf import settings
+from django.db import connection
+import hashlib
+import random
+from .models import Image, ImageKeyword, ImageSignature
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _hash_parameters(count):
+    rng = random.Random(20240917)  # Fixed: stored signatures must stay comparable
+    return [
+        (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+        for _ in range(count)
+    ]
+
+
+HASH_PARAMETERS = _hash_parameters(settings.SIMILARITY_NUM_HASHES)
+ROWS_PER_BAND = settings.SIMILARITY_NUM_HASHES // settings.SIMILARITY_BANDS
+
+
+def token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def compute_signature(features):
+    """MinHash signature of a non-empty feature set"""
+    hashes = [token_hash(feature) for feature in features]
+    return [
+        min((a * value + b) % MERSENNE_PRIME for value in hashes)
+        for a, b in HASH_PARAMETERS
+    ]
+
+
+def compute_bands(signature):
+    """One signed 64-bit hash per band (band index included, so bands never collide)"""
+    bands = []
+    for band in range(settings.SIMILARITY_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            f"{band}:{','.join(map(str, rows))}".encode('ascii'), digest_size=8
+        ).digest()
+        bands.append(int.from_bytes(digest, 'big', signed=True))
+    return bands
+
+
+def estimate_similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def load_features(image_ids):
+    """{image_id: set of feature tokens} in four queries"""
+    image_ids = list(image_ids)
+    features = {image_id: set() for image_id in image_ids}
+
+    keywords = ImageKeyword.objects.filter(image_id__in=image_ids).values_list('image_id', 'keyword')
+    for image_id, keyword in keywords:
+        features[image_id].add(f"k:{keyword}")
+
+    topics = Image.topics.through.objects.filter(image_id__in=image_ids).values_list('image_id', 'topic_id')
+    for image_id, topic_id in topics:
+        features[image_id].add(f"t:{topic_id}")
+
+    places = Image.places.through.objects.filter(image_id__in=image_ids).values_list('image_id', 'place_id')
+    for image_id, place_id in places:
+        features[image_id].add(f"p:{place_id}")
+
+    categories = Image.objects.filter(id__in=image_ids, category__isnull=False).values_list('id', 'category_id')
+    for image_id, category_id in categories:
+        features[image_id].add(f"c:{category_id}")
+
+    return features
+
+
+def update_signatures(image_ids):
+    """Recompute and upsert the signatures of the given images; returns rows written"""
+    features = load_features(image_ids)
+    signatures = []
+    for image_id, tokens in features.items():
+        if not tokens:
+            continue
+        signature = compute_signature(tokens)
+        signatures.append(ImageSignature(
+            image_id=image_id,
+            signature=signature,
+            bands=compute_bands(signature),
+            feature_count=len(tokens)
+        ))
+
+    # Images that lost all their features can no longer be matched
+    empty = [image_id for image_id, tokens in features.items() if not tokens]
+    if empty:
+        ImageSignature.objects.filter(image_id__in=empty).delete()
+
+    ImageSignature.objects.bulk_create(
+        signatures,
+        update_conflicts=True,
+        unique_fields=['image'],
+        update_fields=['signature', 'bands', 'feature_count', 'updated_at']
+    )
+    return len(signatures)
+
+
+def find_similar(image_id, candidates=None, limit=12):
+    """
+    [(image_id, estimated similarity)] for images sharing an LSH band
+
+    candidates optionally restricts matches to a queryset of images.
+    """
+    try:
+        source = ImageSignature.objects.get(image_id=image_id)
+    except ImageSignature.DoesNotExist:
+        return []
+
+    matches = ImageSignature.objects.filter(bands__overlap=source.bands).exclude(image_id=image_id)
+    if candidates is not None:
+        matches = matches.filter(image_id__in=candidates.order_by().values('id'))
+    rows = matches.values_list('image_id', 'signature')[:settings.SIMILARITY_MAX_CANDIDATES]
+
+    scored = [
+        (other_id, estimate_similarity(source.signature, signature))
+        for other_id, signature in rows
+    ]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return [
+        (other_id, score) for other_id, score in scored[:limit]
+        if score >= settings.SIMILARITY_MIN_SCORE
+    ]
+
+
+def exact_jaccard(first, second):
+    if not first and not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def analyze_signatures():
+    """Refresh planner statistics after bulk signature rebuilds"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE image_signatures')
@@ -0,0 +1,272 @@
+"""
+Search-box autocomplete
+
+Suggestions come from a compact vocabulary table (suggestion_terms) of
+distinct keywords, published titles and taxonomy names, never from the
+images table. Each worker keeps the vocabulary as a sorted list and answers
+prefix queries with a binary search; short prefixes, whose ranges can span
+most of the vocabulary, are answered from precomputed per-prefix lists of
+the heaviest terms. New terms and weight increments are published to the
+cache as numbered deltas that workers merge into their index; a worker
+that falls too far behind, or whose index is older than
+SUGGEST_REBUILD_INTERVAL, reloads the table. When a prefix has too few
+matches (typos), a pg_trgm similarity query on the vocabulary table fills
+the gap.
+"""
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db import connection, connections
+import threading
+import time
+import unicodedata
+from .models import Category, Topic, Place, SuggestionTerm
+
+VERSION_KEY = 'suggest:version'
+DELTA_KEY = 'suggest:delta:{}'
+
+TRIGRAM_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS suggestion_terms_trgm_idx
+    ON suggestion_terms USING gin (normalized gin_trgm_ops);
+"""
+
+
+def normalize_term(text):
+    """Lowercase, collapse whitespace and strip accents (é -> e)"""
+    text = ' '.join(str(text).lower().split())
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def install_trigram_index(sender=None, using='default', **kwargs):
+    """Enable pg_trgm and index the vocabulary for fuzzy lookups (post_migrate)"""
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(TRIGRAM_SQL)
+
+
+UPSERT_SQL = """
+INSERT INTO suggestion_terms (normalized, kind, text, weight)
+VALUES {values}
+ON CONFLICT (normalized, kind) DO {action}
+"""
+
+KINDS = [kind for kind, _ in SuggestionTerm.KIND_CHOICES]
+
+
+class SuggestionIndex:
+    """Sorted in-memory vocabulary for prefix lookups"""
+
+    def __init__(self):
+        self.keys = []  # (normalized, kind), sorted
+        self.entries = {}  # (normalized, kind) -> (text, weight)
+        self.top = {}  # (short prefix, kind) -> heaviest keys first, at most SUGGEST_TOP_K
+        self.version = None
+        self.built_at = 0
+        self.lock = threading.Lock()
+
+    def rank(self, key):
+        text, weight = self.entries[key]
+        return -weight, text
+
+    def short_prefixes(self, normalized):
+        return [normalized[:length] for length in range(1, min(len(normalized), settings.SUGGEST_TOP_PREFIX_LENGTH) + 1)]
+
+    def rebuild(self):
+        version = get_version()
+        rows = SuggestionTerm.objects.values_list('normalized', 'kind', 'text', 'weight')
+        entries = {(normalized, kind): (text, weight) for normalized, kind, text, weight in rows.iterator()}
+        self.entries = entries
+        self.keys = sorted(entries)
+
+        top = {}
+        for key in self.keys:
+            for prefix in self.short_prefixes(key[0]):
+                top.setdefault((prefix, key[1]), []).append(key)
+        for keys in top.values():
+            keys.sort(key=self.rank)
+            del keys[settings.SUGGEST_TOP_K:]
+        self.top = top
+
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def apply(self, terms):
+        """Merge a delta: new terms, and weight increments when additive"""
+        for text, kind, weight, additive in terms:
+            key = (normalize_term(text), kind)
+            current = self.entries.get(key)
+            if current is None:
+                insort(self.keys, key)
+                self.entries[key] = (text, weight)
+            elif additive and weight:
+                self.entries[key] = (current[0], current[1] + weight)
+            else:
+                continue
+            # Weights only grow between rebuilds, so truncated lists stay exact
+            for prefix in self.short_prefixes(key[0]):
+                keys = self.top.setdefault((prefix, kind), [])
+                if key in keys:
+                    keys.remove(key)
+                keys.append(key)
+                keys.sort(key=self.rank)
+                del keys[settings.SUGGEST_TOP_K:]
+
+    def refresh(self):
+        """Catch up with published deltas (one cache read when up to date)"""
+        with self.lock:
+            expired = time.monotonic() - self.built_at > settings.SUGGEST_REBUILD_INTERVAL
+            if self.version is None or expired:
+                self.rebuild()
+                return
+
+            current = get_version()
+            if current <= self.version:
+                return
+            if current - self.version > settings.SUGGEST_MAX_DELTAS:
+                self.rebuild()
+                return
+
+            versions = range(self.version + 1, current + 1)
+            deltas = cache.get_many([DELTA_KEY.format(version) for version in versions])
+            for version in versions:
+                terms = deltas.get(DELTA_KEY.format(version))
+                if terms is None:
+                    # The newest delta may still be in flight; an older gap has expired
+                    if version != current:
+                        self.rebuild()
+                    return
+                self.apply(terms)
+                self.version = version
+
+    def lookup(self, prefix, kinds=None, limit=10):
+        """Heaviest terms starting with prefix"""
+        if len(prefix) <= settings.SUGGEST_TOP_PREFIX_LENGTH:
+            candidates = [
+                key for kind in (kinds or KINDS)
+                for key in self.top.get((prefix, kind), ())
+            ]
+        else:
+            # Longer prefixes select a short range: rank all of it
+            candidates = []
+            index = bisect_left(self.keys, (prefix, ''))
+            while index < len(self.keys) and self.keys[index][0].startswith(prefix):
+                if kinds is None or self.keys[index][1] in kinds:
+                    candidates.append(self.keys[index])
+                index += 1
+
+        candidates.sort(key=self.rank)
+        return [
+            {'text': self.entries[key][0], 'kind': key[1], 'weight': self.entries[key][1]}
+            for key in candidates[:limit]
+        ]
+
+
+_index = SuggestionIndex()
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def publish_terms(terms, increment=True):
+    """
+    Add (text, kind) pairs to the vocabulary and announce them to workers
+
+    Each distinct term adds 1 to the weight of an existing entry, unless
+    increment is False (then only new terms are added, with weight 1).
+    """
+    rows = {}
+    for text, kind in terms:
+        text = ' '.join(str(text or '').split())[:500]
+        if text:
+            rows.setdefault((normalize_term(text), kind), text)
+    if not rows:
+        return
+
+    params = []
+    for (normalized, kind), text in rows.items():
+        params.extend([normalized, kind, text, 1])
+    sql = UPSERT_SQL.format(
+        values=', '.join(['(%s, %s, %s, %s)'] * len(rows)),
+        action='UPDATE SET weight = suggestion_terms.weight + EXCLUDED.weight' if increment else 'NOTHING'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+    get_version()
+    version = cache.incr(VERSION_KEY)
+    cache.set(
+        DELTA_KEY.format(version),
+        [(text, kind, 1, increment) for (_, kind), text in rows.items()],
+        timeout=settings.SUGGEST_DELTA_TTL
+    )
+
+
+def reset_index():
+    """Make every worker reload the vocabulary table on its next query"""
+    get_version()
+    cache.incr(VERSION_KEY, delta=settings.SUGGEST_MAX_DELTAS + 1)
+
+
+def publish_image_terms(image, increment=True):
+    """
+    Keywords and titles of a published image
+
+    Pass increment=False when republishing an image already counted (metadata
+    edits), so its existing terms are not weighted twice.
+    """
+    terms = []
+    for metadata in image.metadata.all():
+        if metadata.title:
+            terms.append((metadata.title, 'title'))
+        if isinstance(metadata.keywords, list):
+            terms.extend((keyword, 'keyword') for keyword in metadata.keywords)
+    publish_terms(terms, increment=increment)
+
+
+def publish_taxonomy_term(instance):
+    kinds = {Category: 'category', Topic: 'topic', Place: 'place'}
+    publish_terms([(instance.name, kinds[type(instance)])], increment=False)
+
+
+def fuzzy_lookup(query, kinds=None, limit=10, exclude=()):
+    """Trigram-similar vocabulary terms, for typos"""
+    queryset = SuggestionTerm.objects.filter(normalized__trigram_similar=query)
+    if kinds is not None:
+        queryset = queryset.filter(kind__in=kinds)
+    if exclude:
+        queryset = queryset.exclude(normalized__in=list(exclude))
+    queryset = queryset.annotate(
+        similarity=TrigramSimilarity('normalized', query)
+    ).order_by('-similarity', '-weight')
+    return [
+        {'text': term.text, 'kind': term.kind, 'weight': term.weight}
+        for term in queryset[:limit]
+    ]
+
+
+def suggest(query, kinds=None, limit=10):
+    """Prefix matches from memory, topped up with fuzzy matches when short"""
+    prefix = normalize_term(query)
+    if not prefix:
+        return [], False
+
+    _index.refresh()
+    suggestions = _index.lookup(prefix, kinds=kinds, limit=limit)
+
+    fuzzy = False
+    if len(suggestions) < limit and len(prefix) >= settings.SUGGEST_FUZZY_MIN_LENGTH:
+        seen = {normalize_term(item['text']) for item in suggestions}
+        extra = fuzzy_lookup(prefix, kinds=kinds, limit=limit - len(suggestions), exclude=seen)
+        fuzzy = bool(extra)
+        suggestions.extend(extra)
+    return suggestions, fuzzy
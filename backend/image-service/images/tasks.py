@@ -1,19 +1,37 @@
 """
 Celery tasks for image processing
 """
-from celery import shared_task
+from celery import shared_task, chord
 from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
 from PIL import Image, ImageDraw, ImageFont
 import pyvips
+import hashlib
 import os
+import requests
+import time
+import zipfile
 from datetime import datetime, timedelta
-from .models import Image as ImageModel, ImageDerivative, UploadTask
+from .models import Image as ImageModel, ImageDerivative, UploadTask, UploadSession, BulkIngest
+from .watermark import apply_watermark_vips
+from .ingest import probe_image, probe_result, write_chunks, build_upload_path
+from .search_cache import bump_catalog_generation
+from .search_vectors import refresh_search_vectors
+from . import catalog, events, similarity
+
+
+# Keep libvips' operation cache bounded so long-running workers stay flat
+pyvips.cache_set_max_mem(settings.VIPS_CACHE_MAX_MEM)
 
 
 @shared_task
-def create_derivatives(image_id):
+def create_derivatives(image_id, refresh_catalog=True):
     """
     Create image derivatives (thumbnail, preview, medium)
+
+    Bulk callers pass refresh_catalog=False and refresh the catalog and
+    search cache once for the whole run.
     """
     try:
         image = ImageModel.objects.get(id=image_id)
@@ -22,35 +40,10 @@ def create_derivatives(image_id):
         if not os.path.exists(original_path):
             raise FileNotFoundError(f"Original image not found: {original_path}")
         
-        # Use pyvips for efficient image processing
-        vips_image = pyvips.Image.new_from_file(original_path, access='sequential')
-        
-        # Create thumbnail (200px)
-        thumbnail_path = create_derivative(
-            vips_image, 
-            image, 
-            'thumbnail', 
-            settings.THUMBNAIL_SIZE,
-            watermark=False
-        )
-        
-        # Create watermarked preview (1024px)
-        preview_path = create_derivative(
-            vips_image, 
-            image, 
-            'preview', 
-            settings.PREVIEW_SIZE,
-            watermark=True
-        )
-        
-        # Create medium (2048px)
-        medium_path = create_derivative(
-            vips_image, 
-            image, 
-            'medium', 
-            settings.MEDIUM_SIZE,
-            watermark=False
-        )
+        if settings.DERIVATIVE_PIPELINE == 'single_decode':
+            create_derivatives_single_decode(original_path, image)
+        else:
+            create_derivatives_legacy(original_path, image)
         
         # Store original reference
         ImageDerivative.objects.update_or_create(
@@ -64,6 +57,12 @@ def create_derivatives(image_id):
                 'is_watermarked': False,
             }
         )
+        image.record_derivative('original', image.file_path, image.width, image.height)
+
+        # Regenerated derivatives of a published image change its catalog row
+        if refresh_catalog and image.status == 'published':
+            catalog.refresh_catalog([image.id])
+            bump_catalog_generation()
         
         return {
             'success': True,
@@ -79,6 +78,76 @@ def create_derivatives(image_id):
         }
 
 
+def create_derivatives_single_decode(original_path, image):
+    """
+    Decode the original once and cascade the derivatives from it
+
+    The medium derivative is loaded with shrink-on-load (JPEG/WebP decode
+    at a reduced scale), kept in memory, and the preview and thumbnail are
+    resampled from that buffer instead of from the full-resolution original.
+    """
+    # Largest derivative straight from the file, shrink-on-load where supported
+    medium = pyvips.Image.thumbnail(
+        original_path,
+        settings.MEDIUM_SIZE,
+        height=settings.MEDIUM_SIZE,
+        size='down'
+    ).copy_memory()
+    save_derivative(medium, image, 'medium', watermark=False)
+    
+    # Preview from the medium buffer (at most MEDIUM_SIZE x MEDIUM_SIZE pixels)
+    preview = medium.thumbnail_image(
+        settings.PREVIEW_SIZE,
+        height=settings.PREVIEW_SIZE,
+        size='down'
+    ).copy_memory()
+    del medium
+    save_derivative(preview, image, 'preview', watermark=True)
+    
+    # Thumbnail from the (unwatermarked) preview buffer
+    thumbnail = preview.thumbnail_image(
+        settings.THUMBNAIL_SIZE,
+        height=settings.THUMBNAIL_SIZE,
+        size='down'
+    )
+    save_derivative(thumbnail, image, 'thumbnail', watermark=False)
+
+
+def create_derivatives_legacy(original_path, image):
+    """
+    Resize every derivative from the full-resolution original
+    """
+    # Use pyvips for efficient image processing
+    vips_image = pyvips.Image.new_from_file(original_path, access='sequential')
+    
+    # Create thumbnail (200px)
+    create_derivative(
+        vips_image, 
+        image, 
+        'thumbnail', 
+        settings.THUMBNAIL_SIZE,
+        watermark=False
+    )
+    
+    # Create watermarked preview (1024px)
+    create_derivative(
+        vips_image, 
+        image, 
+        'preview', 
+        settings.PREVIEW_SIZE,
+        watermark=True
+    )
+    
+    # Create medium (2048px)
+    create_derivative(
+        vips_image, 
+        image, 
+        'medium', 
+        settings.MEDIUM_SIZE,
+        watermark=False
+    )
+
+
 def create_derivative(vips_image, image, kind, max_size, watermark=False):
     """
     Create a single derivative using pyvips
@@ -98,7 +167,31 @@ def create_derivative(vips_image, image, kind, max_size, watermark=False):
     scale = new_width / width
     resized = vips_image.resize(scale)
     
-    # Generate file path
+    return save_derivative(resized, image, kind, watermark=watermark)
+
+
+def get_derivative_spec_version():
+    """
+    Fingerprint of the settings that affect rendered derivatives
+
+    Derivatives recorded with a different value are stale and can be
+    rebuilt with the regenerate_derivatives management command.
+    """
+    spec = '|'.join(str(value) for value in [
+        settings.THUMBNAIL_SIZE,
+        settings.PREVIEW_SIZE,
+        settings.MEDIUM_SIZE,
+        settings.WATERMARK_TEXT,
+        settings.WATERMARK_FONT,
+        settings.WATERMARK_ENGINE,
+    ])
+    return hashlib.md5(spec.encode('utf-8')).hexdigest()[:12]
+
+
+def get_derivative_paths(image, kind):
+    """
+    Get (relative, absolute) storage paths for a derivative
+    """
     base_name, ext = os.path.splitext(image.filename)
     derivative_filename = f"{base_name}_{kind}{ext}"
     derivative_rel_path = os.path.join(
@@ -106,15 +199,27 @@ def create_derivative(vips_image, image, kind, max_size, watermark=False):
         derivative_filename
     )
     derivative_path = os.path.join(settings.STORAGE_ROOT, derivative_rel_path)
+    return derivative_rel_path, derivative_path
+
+
+def save_derivative(resized, image, kind, watermark=False):
+    """
+    Write a resized image to storage and record the derivative
+    """
+    derivative_rel_path, derivative_path = get_derivative_paths(image, kind)
     
     # Ensure directory exists
     os.makedirs(os.path.dirname(derivative_path), exist_ok=True)
     
+    # Composite the watermark in the pyvips graph so the derivative is encoded once
+    if watermark and settings.WATERMARK_ENGINE == 'vips':
+        resized = apply_watermark_vips(resized)
+    
     # Save image
     resized.write_to_file(derivative_path, Q=85)
     
     # Apply watermark if needed
-    if watermark:
+    if watermark and settings.WATERMARK_ENGINE == 'pillow':
         apply_watermark_pillow(derivative_path)
     
     # Get file size
@@ -126,12 +231,14 @@ def create_derivative(vips_image, image, kind, max_size, watermark=False):
         kind=kind,
         defaults={
             'file_path': derivative_rel_path,
-            'width': new_width,
-            'height': new_height,
+            'width': resized.width,
+            'height': resized.height,
             'filesize': filesize,
             'is_watermarked': watermark,
+            'spec_version': get_derivative_spec_version(),
         }
     )
+    image.record_derivative(kind, derivative_rel_path, resized.width, resized.height)
     
     return derivative_path
 
@@ -207,8 +314,8 @@ def process_upload(upload_task_id):
         if not os.path.exists(full_path):
             raise FileNotFoundError(f"Upload file not found: {full_path}")
         
-        # Calculate MD5
-        md5 = ImageModel.calculate_md5(full_path)
+        # Use the MD5 computed while the upload was streamed, if any
+        md5 = upload_task.md5 or ImageModel.calculate_md5(full_path)
         
         # Check for duplicates
         existing = ImageModel.objects.filter(md5=md5).first()
@@ -218,11 +325,17 @@ def process_upload(upload_task_id):
             upload_task.save()
             return {'success': False, 'error': 'Duplicate image'}
         
-        # Get image dimensions
-        vips_image = pyvips.Image.new_from_file(full_path)
-        width = vips_image.width
-        height = vips_image.height
-        filesize = os.path.getsize(full_path)
+        # Get image dimensions (from the upload-time header probe if available)
+        if upload_task.width and upload_task.height:
+            width = upload_task.width
+            height = upload_task.height
+            mime_type = upload_task.mime_type
+        else:
+            probe = probe_image(full_path)
+            width = probe['width']
+            height = probe['height']
+            mime_type = probe['mime_type']
+        filesize = upload_task.filesize or os.path.getsize(full_path)
         
         # Create image record
         image = ImageModel.objects.create(
@@ -237,7 +350,7 @@ def process_upload(upload_task_id):
             height=height,
             orientation='landscape' if width > height else ('portrait' if height > width else 'square'),
             filesize=filesize,
-            mime_type='image/jpeg',
+            mime_type=mime_type,
         )
         
         # Update upload task
@@ -259,25 +372,236 @@ def process_upload(upload_task_id):
         return {'success': False, 'error': str(e)}
 
 
+ZIP_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tif', '.tiff', '.webp', '.heic'}
+
+
+def is_zip_image_entry(info):
+    """Whether a ZIP entry should be ingested as an image"""
+    name = os.path.basename(info.filename)
+    if info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+        return False
+    return os.path.splitext(name)[1].lower() in ZIP_IMAGE_EXTENSIONS
+
+
+def stage_zip_entry(archive, info, bulk):
+    """
+    Stream one archive entry into storage, hashing and probing it on the way
+    """
+    original_filename = os.path.basename(info.filename)
+    rel_path = build_upload_path(bulk.uploader_id, original_filename)
+    full_path = os.path.join(settings.STORAGE_ROOT, rel_path)
+
+    try:
+        with archive.open(info) as source:
+            result = write_chunks(iter(lambda: source.read(1048576), b''), full_path)
+    except Exception:
+        if os.path.exists(full_path):
+            os.remove(full_path)
+        raise
+    result = probe_result(result, full_path)
+    result.update({
+        'original_filename': original_filename,
+        'file_path': rel_path,
+    })
+    return result
+
+
+def commit_zip_batch(bulk, batch, seen_md5):
+    """
+    Dedupe a batch of staged entries with one md5__in lookup and
+    bulk_create their Image and UploadTask rows
+
+    Returns (image_ids, duplicate_count, failed_count).
+    """
+    existing = set(
+        ImageModel.objects.filter(md5__in=[entry['md5'] for entry in batch])
+        .values_list('md5', flat=True)
+    )
+    now = datetime.now()
+    accepted = []
+    rejected_tasks = []
+    duplicates = failed = 0
+
+    for entry in batch:
+        error = ''
+        if entry['md5'] in existing or entry['md5'] in seen_md5:
+            error = 'Duplicate image already exists'
+            duplicates += 1
+        elif not entry.get('width') or not entry.get('height'):
+            error = 'Unsupported image format'
+            failed += 1
+
+        if error:
+            # Never keep bytes we won't catalog
+            os.remove(os.path.join(settings.STORAGE_ROOT, entry['file_path']))
+            rejected_tasks.append(UploadTask(
+                uploader_id=bulk.uploader_id,
+                original_filename=entry['original_filename'],
+                file_path=entry['file_path'],
+                status='failed',
+                error_message=error,
+                bulk_ingest=bulk,
+                md5=entry['md5'],
+                filesize=entry['filesize'],
+                finished_at=now,
+            ))
+            continue
+
+        seen_md5.add(entry['md5'])
+        accepted.append(entry)
+
+    def build_image(entry):
+        width, height = entry['width'], entry['height']
+        return ImageModel(
+            uploader_id=bulk.uploader_id,
+            uploader_email=bulk.uploader_email,
+            filename=entry['original_filename'],
+            file_path=entry['file_path'],
+            type=bulk.type,
+            status='draft',
+            md5=entry['md5'],
+            width=width,
+            height=height,
+            orientation='landscape' if width > height else ('portrait' if height > width else 'square'),
+            filesize=entry['filesize'],
+            mime_type=entry['mime_type'],
+        )
+
+    def build_task(entry, image):
+        return UploadTask(
+            uploader_id=bulk.uploader_id,
+            original_filename=entry['original_filename'],
+            file_path=entry['file_path'],
+            status='completed',
+            image=image,
+            bulk_ingest=bulk,
+            finished_at=now,
+            **{key: entry[key] for key in (
+                'md5', 'secondary_hash', 'filesize', 'width', 'height', 'mime_type'
+            )}
+        )
+
+    images = []
+    try:
+        with transaction.atomic():
+            images = ImageModel.objects.bulk_create([build_image(entry) for entry in accepted])
+            UploadTask.objects.bulk_create(
+                [build_task(entry, image) for entry, image in zip(accepted, images)] + rejected_tasks
+            )
+    except IntegrityError:
+        # Another upload inserted one of these MD5s meanwhile: fall back to row by row
+        images = []
+        for entry in accepted:
+            try:
+                with transaction.atomic():
+                    image = build_image(entry)
+                    image.save()
+                    build_task(entry, image).save()
+                images.append(image)
+            except IntegrityError:
+                duplicates += 1
+                os.remove(os.path.join(settings.STORAGE_ROOT, entry['file_path']))
+        UploadTask.objects.bulk_create(rejected_tasks)
+
+    return [image.id for image in images], duplicates, failed
+
+
+@shared_task
+def ingest_zip(bulk_ingest_id):
+    """
+    Ingest a ZIP archive entry by entry without extracting it first,
+    then fan derivative creation out as a Celery group
+    """
+    bulk = BulkIngest.objects.get(id=bulk_ingest_id)
+    archive_path = os.path.join(settings.STORAGE_ROOT, bulk.file_path)
+    image_ids = []
+    seen_md5 = set()
+
+    try:
+        bulk.status = 'extracting'
+        bulk.save(update_fields=['status'])
+
+        with zipfile.ZipFile(archive_path) as archive:
+            entries = [info for info in archive.infolist() if is_zip_image_entry(info)]
+            bulk.total_entries = len(entries)
+            bulk.save(update_fields=['total_entries'])
+
+            batch = []
+            for index, info in enumerate(entries, start=1):
+                if info.file_size > settings.BULK_INGEST_MAX_ENTRY_SIZE:
+                    bulk.failed_entries += 1
+                else:
+                    try:
+                        batch.append(stage_zip_entry(archive, info, bulk))
+                    except (zipfile.BadZipFile, OSError, EOFError):
+                        # Corrupt entry: skip it, keep ingesting the rest
+                        bulk.failed_entries += 1
+
+                if len(batch) >= settings.BULK_INGEST_BATCH_SIZE or index == len(entries):
+                    if batch:
+                        ids, duplicates, failed = commit_zip_batch(bulk, batch, seen_md5)
+                        image_ids.extend(ids)
+                        bulk.created_images += len(ids)
+                        bulk.duplicate_entries += duplicates
+                        bulk.failed_entries += failed
+                        batch = []
+                    bulk.processed_entries = index
+                    bulk.save(update_fields=[
+                        'processed_entries', 'created_images', 'duplicate_entries', 'failed_entries'
+                    ])
+
+        # The originals are now in storage: the archive is no longer needed
+        if settings.BULK_INGEST_DELETE_ARCHIVE:
+            os.remove(archive_path)
+
+        if image_ids:
+            bulk.status = 'processing'
+            bulk.save(update_fields=['status'])
+            chord(create_derivatives.s(image_id) for image_id in image_ids)(
+                finish_bulk_ingest.s(bulk.id)
+            )
+        else:
+            finish_bulk_ingest([], bulk.id)
+
+        return {'success': True, 'bulk_ingest_id': bulk.id, 'created_images': len(image_ids)}
+
+    except Exception as e:
+        bulk.status = 'failed'
+        bulk.error_message = str(e)
+        bulk.finished_at = datetime.now()
+        bulk.save()
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def finish_bulk_ingest(results, bulk_ingest_id):
+    """
+    Record derivative outcomes for a bulk ingest (chord callback)
+    """
+    completed = sum(1 for result in results if result.get('success'))
+    BulkIngest.objects.filter(id=bulk_ingest_id).update(
+        derivatives_completed=completed,
+        derivatives_failed=len(results) - completed,
+        status='completed',
+        finished_at=datetime.now(),
+    )
+    return {'success': True, 'bulk_ingest_id': bulk_ingest_id}
+
+
 @shared_task
 def reindex_search(image_id):
     """
     Reindex image for full-text search
+
+    Metadata edits are indexed by database triggers; this rebuilds one
+    image's vectors on demand with the same SQL.
     """
-    from django.contrib.postgres.search import SearchVector
-    
     try:
         image = ImageModel.objects.get(id=image_id)
-        
-        # Get metadata
-        metadata = image.metadata.filter(language='en').first()
-        if metadata:
-            # Create search vector from title, caption, and keywords
-            keywords_text = ' '.join(metadata.keywords) if metadata.keywords else ''
-            search_text = f"{metadata.title} {metadata.caption} {keywords_text}"
-            
-            image.search_vector = SearchVector('filename') + SearchVector(models.Value(search_text))
-            image.save(update_fields=['search_vector'])
+        refresh_search_vectors([image.id])
+        catalog.refresh_catalog([image.id])
+        if image.status == 'published':
+            bump_catalog_generation()
         
         return {'success': True, 'image_id': image_id}
     except Exception as e:
@@ -294,6 +618,43 @@ def expire_download_tokens():
     return {'success': True, 'message': 'Download token expiration task'}
 
 
+@shared_task
+def expire_upload_sessions():
+    """
+    Expire upload sessions idle past expires_at and delete their temp files (called periodically)
+    """
+    try:
+        # Sessions a chunk, finalize or abort holds are skipped; they are not idle
+        with transaction.atomic():
+            sessions = list(
+                UploadSession.objects.select_for_update(skip_locked=True)
+                .filter(status='open', expires_at__lt=timezone.now())
+                .only('id', 'temp_path')
+            )
+            UploadSession.objects.filter(id__in=[session.id for session in sessions]).update(
+                status='expired', updated_at=timezone.now()
+            )
+
+        removed = 0
+        for session in sessions:
+            if os.path.exists(session.temp_path):
+                os.remove(session.temp_path)
+                removed += 1
+
+        # Temp files no open session owns, e.g. left by a failed session save
+        cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+        owned = set(UploadSession.objects.filter(status='open').values_list('temp_path', flat=True))
+        if os.path.isdir(settings.UPLOAD_SESSION_DIR):
+            for entry in os.scandir(settings.UPLOAD_SESSION_DIR):
+                if entry.is_file() and entry.path not in owned and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+
+        return {'success': True, 'expired_count': len(sessions), 'removed_files': removed}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
 @shared_task
 def archive_old_images():
     """
@@ -307,7 +668,7 @@ def archive_old_images():
             published_at__lt=archive_date
         )
         
-        archived_count = 0
+        archived_ids = []
         for image in images_to_archive:
             # Move file to archive
             original_path = os.path.join(settings.STORAGE_ROOT, image.file_path)
@@ -322,8 +683,57 @@ def archive_old_images():
                 image.file_path = os.path.join('archive', image.file_path)
                 image.save()
                 
-                archived_count += 1
+                archived_ids.append(image.id)
+        
+        archived_count = len(archived_ids)
+        if archived_count:
+            catalog.refresh_catalog(archived_ids)
+            bump_catalog_generation()
+            events.emit_images(ImageModel.objects.filter(id__in=archived_ids), event='archived')
         
         return {'success': True, 'archived_count': archived_count}
     except Exception as e:
         return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def refresh_catalog_popularity():
+    """
+    Copy view/download/purchase counters into the public catalog (called periodically)
+    """
+    try:
+        updated = catalog.refresh_catalog_popularity()
+        return {'success': True, 'updated': updated}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def update_image_signatures(image_ids):
+    """
+    Recompute similarity signatures after keyword or taxonomy changes
+    """
+    try:
+        updated = similarity.update_signatures(image_ids)
+        return {'success': True, 'updated': updated}
+    except Exception as e:
+        return {'success': False, 'image_ids': image_ids, 'error': str(e)}
+
+
+@shared_task(bind=True, max_retries=settings.IMAGE_EVENT_MAX_RETRIES)
+def publish_image_events(self, snapshots):
+    """
+    Deliver image change events to the order service's catalog replica
+    """
+    try:
+        response = requests.post(
+            f"{settings.ORDER_SERVICE_URL}/api/internal/image-events/",
+            json={'events': snapshots},
+            headers={'X-Internal-Token': settings.INTERNAL_SERVICE_TOKEN},
+            timeout=settings.IMAGE_EVENT_TIMEOUT
+        )
+        response.raise_for_status()
+        return {'success': True, 'delivered': len(snapshots)}
+    except requests.RequestException as e:
+        # Versioned snapshots make redelivery safe; sync_catalog_images repairs anything dropped
+        raise self.retry(exc=e, countdown=min(5 * 2 ** self.request.retries, 600))
@@ -0,0 +1,310 @@
+"""
+Tests for the images app
+"""
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from datetime import timedelta
+import os
+import tempfile
+from . import catalog, search_cache
+from .suggestions import SuggestionIndex
+from .tasks import expire_upload_sessions
+from .models import Category, Image, ImageMetadata, Place, Topic, UploadSession
+from .serializers import ImageListSerializer, MapPinsSerializer
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_image(index, **fields):
+    path = f"2024/01/user_1/image_{index}.jpg"
+    defaults = {
+        'uploader_id': 1,
+        'uploader_email': 'photographer@example.com',
+        'filename': f"image_{index}.jpg",
+        'file_path': path,
+        'md5': f"{index:032x}",
+        'width': 4000,
+        'height': 3000,
+        'orientation': 'landscape',
+        'filesize': 1024,
+        'mime_type': 'image/jpeg',
+        'status': 'published',
+        'published_at': timezone.now() - timedelta(minutes=index),
+        'derivatives_summary': {
+            kind: {'path': path.replace('.jpg', f"_{kind}.jpg"), 'width': 200, 'height': 150}
+            for kind in ['thumbnail', 'preview']
+        },
+    }
+    defaults.update(fields)
+    return Image.objects.create(**defaults)
+
+
+@override_settings(CACHES=TEST_CACHES, SEARCH_CACHE_ENABLED=False)
+class ListQueryCountTests(TestCase):
+    """List and search pages render from one query, whatever the page size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Sport', slug='sport')
+        cls.images = [make_image(index, category=cls.category) for index in range(1, 21)]
+        catalog.refresh_catalog([image.id for image in cls.images])
+        cls.user = User.objects.create_user('tester')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_serializer_reads_derivative_summary(self):
+        images = list(Image.objects.select_related('category').filter(id__in=[i.id for i in self.images]))
+        with self.assertNumQueries(0):
+            rows = ImageListSerializer(images, many=True).data
+        self.assertEqual(len(rows), 20)
+        self.assertTrue(all(row['thumbnail_url'] and row['preview_url'] for row in rows))
+        self.assertTrue(all(row['category_name'] == 'Sport' for row in rows))
+
+    def test_staff_list_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/images/', {'page_size': 20}, HTTP_X_USER_ROLE='admin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_staff_search_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/api/images/search/', {'type': 'photo', 'page_size': 20}, HTTP_X_USER_ROLE='admin'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_public_list_is_one_catalog_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/images/', {'page_size': 20}, HTTP_X_USER_ROLE='customer')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertTrue(all(row['thumbnail_url'] for row in response.data['results']))
+
+    def test_public_list_of_unpublished_status_is_empty(self):
+        response = self.client.get('/api/images/', {'status': 'draft'}, HTTP_X_USER_ROLE='customer')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+
+@override_settings(CACHES=TEST_CACHES, SEARCH_CACHE_ENABLED=False)
+class RankedSearchPaginationTests(TestCase):
+    """Following next links through a ranked search reaches every hit once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.images = [make_image(index) for index in range(1, 8)]
+        for image in cls.images:
+            # Identical text: every hit ties on rank, only the id breaks ties
+            ImageMetadata.objects.create(image=image, language='en', title='Football final')
+        make_image(99, filename='other.jpg')
+        catalog.refresh_catalog([image.id for image in cls.images])
+        cls.user = User.objects.create_user('tester')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, role):
+        seen = []
+        url = '/api/images/search/?q=football&page_size=2'
+        while url:
+            response = self.client.get(url, HTTP_X_USER_ROLE=role)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_staff_search_walks_every_page(self):
+        seen = self.walk('admin')
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {image.id for image in self.images})
+
+    def test_public_search_walks_every_page(self):
+        seen = self.walk('customer')
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {image.id for image in self.images})
+
+    def test_estimated_count_of_empty_search(self):
+        response = self.client.get(
+            '/api/images/search/', {'status': 'draft', 'count': 'estimate'}, HTTP_X_USER_ROLE='customer'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+
+
+@override_settings(CACHES=TEST_CACHES, SEARCH_CACHE_ENABLED=False)
+class FacetTests(TestCase):
+    """Facet counts from the catalog read model, and for searches matching nothing"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Sport', slug='sport')
+        cls.topic = Topic.objects.create(name='Final', slug='final')
+        cls.place = Place.objects.create(name='Algiers', slug='algiers', latitude=36.75, longitude=3.06)
+        cls.images = [make_image(index, category=cls.category) for index in range(1, 4)]
+        for image in cls.images[:2]:
+            image.topics.add(cls.topic)
+            image.places.add(cls.place)
+        catalog.refresh_catalog([image.id for image in cls.images])
+        cls.user = User.objects.create_user('tester')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_public_facets_count_catalog_arrays(self):
+        response = self.client.get('/api/images/search/', {'facets': 'true'}, HTTP_X_USER_ROLE='customer')
+        self.assertEqual(response.status_code, 200)
+        facets = response.data['facets']
+        self.assertEqual(facets['category'], [{'id': self.category.id, 'name': 'Sport', 'count': 3}])
+        self.assertEqual(facets['topic'], [{'id': self.topic.id, 'name': 'Final', 'count': 2}])
+        self.assertEqual(facets['place'], [{'id': self.place.id, 'name': 'Algiers', 'count': 2}])
+
+    def test_facets_of_searches_matching_nothing(self):
+        for params, role in [
+            ({'bbox': '100,10,101,11'}, 'customer'),
+            ({'bbox': '100,10,101,11'}, 'admin'),
+            ({'status': 'draft'}, 'admin'),
+            ({'status': 'draft'}, 'customer'),
+        ]:
+            response = self.client.get(
+                '/api/images/search/', {'facets': 'true', **params}, HTTP_X_USER_ROLE=role
+            )
+            self.assertEqual(response.status_code, 200, params)
+            self.assertEqual(response.data['results'], [])
+            self.assertTrue(all(values == [] for values in response.data['facets'].values()))
+
+    def test_map_of_viewport_without_places(self):
+        for role in ['customer', 'admin']:
+            response = self.client.get('/api/images/map/', {'bbox': '100,10,101,11'}, HTTP_X_USER_ROLE=role)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, {'results': []})
+
+    def test_map_pins_count_places_in_viewport(self):
+        response = self.client.get('/api/images/map/', {'bbox': '2,36,4,37'}, HTTP_X_USER_ROLE='customer')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(pin['place_id'], pin['count']) for pin in response.data['results']], [(self.place.id, 2)])
+
+
+@override_settings(SUGGEST_TOP_PREFIX_LENGTH=2, SUGGEST_TOP_K=3)
+class SuggestionIndexTests(SimpleTestCase):
+    """Prefix lookups rank the whole range by weight, increments included"""
+
+    def setUp(self):
+        self.index = SuggestionIndex()
+        # Alphabetically first terms are the lightest
+        self.index.apply([(f"ba{index:02d}", 'keyword', 1, True) for index in range(10)])
+        self.index.apply([('bz heavy', 'keyword', 5, True), ('bzz', 'title', 1, True)])
+
+    def texts(self, prefix, **kwargs):
+        return [item['text'] for item in self.index.lookup(prefix, **kwargs)]
+
+    def test_short_and_long_prefixes_rank_by_weight(self):
+        self.assertEqual(self.texts('b', limit=2), ['bz heavy', 'ba00'])
+        self.assertEqual(self.texts('bz', kinds=['title']), ['bzz'])
+        self.assertEqual(self.texts('ba0', limit=1), ['ba00'])
+
+    def test_increments_promote_terms(self):
+        self.index.apply([('ba09', 'keyword', 1, True)] * 6)
+        self.assertEqual(self.texts('b', limit=2), ['ba09', 'bz heavy'])
+        self.assertEqual(self.texts('ba09'), ['ba09'])
+        # Non-additive deltas only add missing terms
+        self.index.apply([('ba09', 'keyword', 1, False)])
+        self.assertEqual(self.index.lookup('ba09')[0]['weight'], 7)
+
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchCacheKeyTests(SimpleTestCase):
+    """Cache keys ignore the order of set-like filters only"""
+
+    def validated(self, **params):
+        serializer = MapPinsSerializer(data=params)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer.validated_data
+
+    def test_different_bboxes_have_different_keys(self):
+        first = self.validated(bbox='2,36,4,37')
+        second = self.validated(bbox='2,4,36,37')
+        for prefix in ['facets', 'pins']:
+            self.assertNotEqual(
+                search_cache.get_facets_cache_key(first, prefix=prefix),
+                search_cache.get_facets_cache_key(second, prefix=prefix)
+            )
+
+    def test_topic_order_does_not_matter(self):
+        self.assertEqual(
+            search_cache.get_facets_cache_key(self.validated(bbox='2,36,4,37', topic='1,2')),
+            search_cache.get_facets_cache_key(self.validated(bbox='2,36,4,37', topic='2,1'))
+        )
+
+
+class UploadSessionTests(TestCase):
+    """Open sessions are capped per uploader, expire, and refuse late chunks"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        overrides = override_settings(
+            UPLOAD_SESSION_DIR=self.directory.name,
+            UPLOAD_SESSION_MAX_OPEN=2,
+            UPLOAD_SESSION_MAX_OPEN_BYTES=1000,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user('uploader'))
+        self.headers = {
+            'HTTP_X_USER_ID': '7', 'HTTP_X_USER_EMAIL': 'uploader@example.com', 'HTTP_X_USER_ROLE': 'photographer'
+        }
+
+    def create(self, size=100):
+        return self.client.post(
+            '/api/upload-sessions/', {'filename': 'big.jpg', 'size': size}, format='json', **self.headers
+        )
+
+    def chunk(self, session_id, data=b'x' * 10):
+        return self.client.generic(
+            'PUT', f"/api/upload-sessions/{session_id}/chunk/", data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f"bytes 0-{len(data) - 1}/100", **self.headers
+        )
+
+    def test_open_sessions_and_bytes_are_capped(self):
+        self.assertEqual(self.create(size=600).status_code, 201)
+        self.assertEqual(self.create(size=600).status_code, 429)
+        self.assertEqual(self.create(size=100).status_code, 201)
+        self.assertEqual(self.create(size=100).status_code, 429)
+
+    def test_chunk_after_abort_is_a_conflict(self):
+        session_id = self.create().data['id']
+        response = self.client.post(f"/api/upload-sessions/{session_id}/abort/", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.chunk(session_id).status_code, 409)
+        response = self.client.post(f"/api/upload-sessions/{session_id}/abort/", **self.headers)
+        self.assertEqual(response.status_code, 409)
+
+    def test_chunk_whose_temp_file_is_gone_is_a_conflict(self):
+        session = UploadSession.objects.get(pk=self.create().data['id'])
+        os.remove(session.temp_path)
+        self.assertEqual(self.chunk(session.pk).status_code, 409)
+
+    def test_idle_sessions_expire_with_their_files(self):
+        idle = UploadSession.objects.get(pk=self.create().data['id'])
+        active = UploadSession.objects.get(pk=self.create().data['id'])
+        UploadSession.objects.filter(pk=idle.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        result = expire_upload_sessions()
+
+        self.assertEqual(result['expired_count'], 1)
+        idle.refresh_from_db()
+        self.assertEqual(idle.status, 'expired')
+        self.assertFalse(os.path.exists(idle.temp_path))
+        self.assertTrue(os.path.exists(active.temp_path))
+        self.assertEqual(self.chunk(idle.pk).status_code, 409)
@@ -0,0 +1,46 @@
+"""
+Upload handlers for image service
+"""
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+import os
+from .ingest import IncrementalHasher
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """
+    Stream uploaded files to a temp file on the STORAGE_ROOT filesystem,
+    hashing each chunk as it is written
+
+    Memory per upload stays at the chunk size, and the finished file can be
+    moved into place with os.rename. The hash result is attached to the
+    uploaded file as `ingest`.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+        self.hasher = IncrementalHasher()
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.ingest = self.hasher.result()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            temp_location = self.file.temporary_file_path()
+            try:
+                self.file.close()
+                os.remove(temp_location)
+            except FileNotFoundError:
+                pass
@@ -5,7 +5,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, TopicViewSet, PlaceViewSet,
-    ImageViewSet, ReviewViewSet, UploadTaskViewSet
+    ImageViewSet, ReviewViewSet, UploadTaskViewSet, UploadSessionViewSet,
+    BulkIngestViewSet, SuggestionViewSet, ImageSnapshotViewSet
 )
 
 router = DefaultRouter()
@@ -15,6 +16,10 @@ router.register(r'places', PlaceViewSet, basename='places')
 router.register(r'images', ImageViewSet, basename='images')
 router.register(r'reviews', ReviewViewSet, basename='reviews')
 router.register(r'uploads', UploadTaskViewSet, basename='uploads')
+router.register(r'upload-sessions', UploadSessionViewSet, basename='upload-sessions')
+router.register(r'bulk-ingests', BulkIngestViewSet, basename='bulk-ingests')
+router.register(r'suggestions', SuggestionViewSet, basename='suggestions')
+router.register(r'internal/image-snapshots', ImageSnapshotViewSet, basename='image-snapshots')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -6,22 +6,39 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Exists, OuterRef, Q, Sum
+from django.db.models.functions import Cast
 from django.contrib.postgres.search import SearchQuery, SearchRank
+import hmac
 import os
-import uuid
+import re
 from .models import (
     Category, Topic, Place, Image, ImageDerivative,
-    ImageMetadata, Review, UploadTask
+    ImageMetadata, Review, UploadTask, UploadSession, BulkIngest, CatalogEntry,
+    upload_session_expiry
 )
 from .serializers import (
     CategorySerializer, TopicSerializer, PlaceSerializer,
     ImageSerializer, ImageListSerializer, ImageUploadSerializer,
     ImageUpdateSerializer, ImageMetadataSerializer,
     ReviewSerializer, ReviewActionSerializer, UploadTaskSerializer,
-    SearchSerializer, ImageDerivativeSerializer
+    SearchSerializer, ImageDerivativeSerializer, DuplicateCheckSerializer,
+    UploadSessionSerializer, UploadSessionCreateSerializer, BulkIngestSerializer,
+    SuggestionQuerySerializer, TopKeywordsSerializer, CatalogEntrySerializer,
+    MapPinsSerializer
+)
+from .tasks import process_upload, create_derivatives, ingest_zip, update_image_signatures
+from .pagination import KeysetPagination
+from . import search_cache, suggestions, catalog, events
+from .facets import compute_facets, count_by_place
+from . import geo, similarity
+from .keywords import keyword_filter, count_keywords
+from .search_vectors import LANGUAGE_CONFIGS
+from .ingest import (
+    ingest_uploaded_file, preallocate_file, write_range, merge_range,
+    hash_file, probe_result, build_upload_path, is_zip_filename
 )
-from .tasks import process_upload, create_derivatives, reindex_search
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -30,6 +47,16 @@ class CategoryViewSet(viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def perform_create(self, serializer):
+        suggestions.publish_taxonomy_term(serializer.save())
+
+    def perform_update(self, serializer):
+        category = serializer.save()
+        suggestions.publish_taxonomy_term(category)
+        # Names and parents are denormalized into catalog category paths
+        catalog.refresh_catalog_categories([category.id])
+        search_cache.bump_catalog_generation()
+
     def get_queryset(self):
         queryset = self.queryset
         # Only return root categories for list view
@@ -44,6 +71,12 @@ class TopicViewSet(viewsets.ModelViewSet):
     serializer_class = TopicSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def perform_create(self, serializer):
+        suggestions.publish_taxonomy_term(serializer.save())
+
+    def perform_update(self, serializer):
+        suggestions.publish_taxonomy_term(serializer.save())
+
 
 class PlaceViewSet(viewsets.ModelViewSet):
     """ViewSet for Place management"""
@@ -51,18 +84,49 @@ class PlaceViewSet(viewsets.ModelViewSet):
     serializer_class = PlaceSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def perform_create(self, serializer):
+        suggestions.publish_taxonomy_term(serializer.save())
+
+    def perform_update(self, serializer):
+        suggestions.publish_taxonomy_term(serializer.save())
+
 
 class ImageViewSet(viewsets.ModelViewSet):
     """ViewSet for Image management"""
-    queryset = Image.objects.all()
+    queryset = Image.objects.select_related('category')
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    # Actions the public catalog read model can answer
+    CATALOG_ACTIONS = ['list', 'search', 'top_keywords', 'map_pins']
+
+    def uses_catalog(self):
+        """Public list/search requests read public_catalog instead of images"""
+        user_role = self.request.META.get('HTTP_X_USER_ROLE', 'customer')
+        return self.action in self.CATALOG_ACTIONS and user_role not in search_cache.STAFF_ROLES
 
     def get_serializer_class(self):
-        if self.action == 'list':
-            return ImageListSerializer
+        if self.action in ['list', 'search']:
+            return CatalogEntrySerializer if self.uses_catalog() else ImageListSerializer
         return ImageSerializer
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        catalog.refresh_catalog([serializer.instance.id])
+        search_cache.bump_catalog_generation()
+        update_image_signatures.delay([serializer.instance.id])
+        events.emit_images([serializer.instance])
+
+    def perform_destroy(self, instance):
+        image_id = instance.id
+        super().perform_destroy(instance)
+        search_cache.bump_catalog_generation()
+        events.emit([events.deleted_snapshot(image_id)])
+
     def get_queryset(self):
+        if self.uses_catalog():
+            return self.get_catalog_queryset()
+
         user = self.request.user
         queryset = self.queryset
 
@@ -96,7 +160,28 @@ class ImageViewSet(viewsets.ModelViewSet):
         if category_filter:
             queryset = queryset.filter(category_id=category_filter)
 
-        return queryset.order_by('-created_at')
+        # Stable keyset orderings: public catalog by publication, everything else by upload
+        if user_role in ['admin', 'photographer', 'infographiste', 'validator']:
+            return queryset.order_by('-created_at', 'id')
+        return queryset.order_by('-published_at', 'id')
+
+    def get_catalog_queryset(self):
+        """Published images from the denormalized catalog (single table)"""
+        queryset = CatalogEntry.objects.order_by('-published_at', 'pk')
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter and status_filter != 'published':
+            return queryset.none()
+
+        type_filter = self.request.query_params.get('type')
+        if type_filter:
+            queryset = queryset.filter(type=type_filter)
+
+        category_filter = self.request.query_params.get('category')
+        if category_filter:
+            queryset = queryset.filter(category_id=category_filter)
+
+        return queryset
 
     @action(detail=False, methods=['post'])
     def upload(self, request):
@@ -127,30 +212,34 @@ class ImageViewSet(viewsets.ModelViewSet):
             )
 
         # Generate storage path
-        now = timezone.now()
-        filename = f"{uuid.uuid4()}_{uploaded_file.name}"
-        rel_path = os.path.join(
-            str(now.year),
-            f"{now.month:02d}",
-            f"user_{user_id}",
-            filename
-        )
+        rel_path = build_upload_path(user_id, uploaded_file.name)
         full_path = os.path.join(settings.STORAGE_ROOT, rel_path)
 
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-
-        # Save file
-        with open(full_path, 'wb+') as destination:
-            for chunk in uploaded_file.chunks():
-                destination.write(chunk)
+        # Move the streamed upload into place (hashed on the way) and probe its header
+        ingest = ingest_uploaded_file(uploaded_file, full_path)
+
+        # ZIP archives are ingested entry by entry in the background
+        if is_zip_filename(uploaded_file.name):
+            bulk = BulkIngest.objects.create(
+                uploader_id=user_id,
+                uploader_email=user_email,
+                type=image_type,
+                original_filename=uploaded_file.name,
+                file_path=rel_path,
+            )
+            ingest_zip.delay(bulk.id)
+            return Response({
+                'message': 'Bulk upload initiated',
+                'bulk_ingest_id': bulk.id
+            }, status=status.HTTP_202_ACCEPTED)
 
         # Create upload task
         upload_task = UploadTask.objects.create(
             uploader_id=user_id,
             original_filename=uploaded_file.name,
             file_path=rel_path,
-            status='pending'
+            status='pending',
+            **ingest
         )
 
         # Trigger async processing
@@ -161,6 +250,35 @@ class ImageViewSet(viewsets.ModelViewSet):
             'upload_task_id': upload_task.id
         }, status=status.HTTP_202_ACCEPTED)
 
+    @action(detail=False, methods=['post'])
+    def check_duplicates(self, request):
+        """Report which of a batch of client-computed MD5s already exist"""
+        serializer = DuplicateCheckSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        files = serializer.validated_data['files']
+        md5s = {item['md5'].lower() for item in files}
+
+        # Single indexed lookup for the whole batch
+        existing = dict(
+            Image.objects.filter(md5__in=md5s).values_list('md5', 'filesize')
+        )
+
+        duplicates = []
+        new = []
+        for item in files:
+            md5 = item['md5'].lower()
+            if md5 in existing and item.get('size') in (None, existing[md5]):
+                duplicates.append(md5)
+            else:
+                new.append(md5)
+
+        return Response({
+            'duplicates': duplicates,
+            'new': new,
+        })
+
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """Submit image for review"""
@@ -214,45 +332,87 @@ class ImageViewSet(viewsets.ModelViewSet):
             }
         )
 
-        # Trigger search reindex
-        reindex_search.delay(image.id)
+        # Search vectors are refreshed by the image_metadata triggers
+        if image.status == 'published':
+            catalog.refresh_catalog([image.id])
+            search_cache.bump_catalog_generation()
+            suggestions.publish_image_terms(image, increment=False)
+        update_image_signatures.delay([image.id])
 
         return Response({
             'message': 'Metadata updated',
             'metadata': ImageMetadataSerializer(metadata).data
         })
 
-    @action(detail=False, methods=['get'])
-    def search(self, request):
-        """Search images with full-text search"""
-        search_serializer = SearchSerializer(data=request.query_params)
-        if not search_serializer.is_valid():
-            return Response(search_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        queryset = self.get_queryset()
-        data = search_serializer.validated_data
-
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """More images like this one (MinHash/LSH over keywords and taxonomy)"""
+        image = self.get_object()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 12)), 50))
+        except ValueError:
+            limit = 12
+
+        # Matches are limited to what the caller may see
+        user_role = request.META.get('HTTP_X_USER_ROLE', 'customer')
+        if user_role in search_cache.STAFF_ROLES:
+            candidates = self.get_queryset()
+        else:
+            candidates = Image.objects.filter(status='published')
+
+        matches = similarity.find_similar(image.id, candidates=candidates, limit=limit)
+        images = Image.objects.select_related('category').in_bulk([image_id for image_id, _ in matches])
+        results = []
+        for image_id, score in matches:
+            if image_id in images:
+                row = ImageListSerializer(images[image_id]).data
+                row['similarity'] = round(score, 3)
+                results.append(row)
+        return Response({'results': results})
+
+    def filter_search(self, queryset, data):
+        """Apply the SearchSerializer filters (and text rank ordering)"""
         # Text search
         q = data.get('q')
         if q:
-            search_query = SearchQuery(q)
-            queryset = queryset.filter(search_vector=search_query)
-            queryset = queryset.annotate(rank=SearchRank('search_vector', search_query))
-            queryset = queryset.order_by('-rank')
+            # Route to the per-language vector and config when a language is given
+            language = data.get('language')
+            if language:
+                config, vector_field = LANGUAGE_CONFIGS[language]
+                search_query = SearchQuery(q, config=config)
+            else:
+                vector_field = 'search_vector'
+                search_query = SearchQuery(q)
+            queryset = queryset.filter(**{vector_field: search_query})
+            # ts_rank is a real; a fixed-precision numeric keeps the keyset cursor exact
+            queryset = queryset.annotate(rank=Cast(
+                SearchRank(vector_field, search_query), DecimalField(max_digits=14, decimal_places=8)
+            ))
+            queryset = queryset.order_by('-rank', 'pk')
 
         # Filters
         if 'category' in data:
             queryset = queryset.filter(category_id=data['category'])
-        if 'topic' in data:
-            queryset = queryset.filter(topics__id=data['topic'])
-        if 'place' in data:
-            queryset = queryset.filter(places__id=data['place'])
+        if data.get('topic'):
+            queryset = self.filter_taxonomy(queryset, 'topic', data['topic'], data['topic_match'])
+        if data.get('place'):
+            queryset = self.filter_taxonomy(queryset, 'place', data['place'], data['place_match'])
+        geo_places = self.get_geo_places(data)
+        if geo_places is not None:
+            queryset = self.filter_taxonomy(queryset, 'place', geo_places, 'any') if geo_places else queryset.none()
+        if data.get('keyword'):
+            queryset = queryset.filter(keyword_filter(data['keyword'], data.get('language')))
         if 'type' in data:
             queryset = queryset.filter(type=data['type'])
         if 'orientation' in data:
             queryset = queryset.filter(orientation=data['orientation'])
         if 'status' in data:
-            queryset = queryset.filter(status=data['status'])
+            if queryset.model is CatalogEntry:
+                # The catalog holds published images only
+                if data['status'] != 'published':
+                    queryset = queryset.none()
+            else:
+                queryset = queryset.filter(status=data['status'])
         if 'min_width' in data:
             queryset = queryset.filter(width__gte=data['min_width'])
         if 'max_width' in data:
@@ -262,15 +422,160 @@ class ImageViewSet(viewsets.ModelViewSet):
         if 'date_to' in data:
             queryset = queryset.filter(created_at__lte=data['date_to'])
 
+        return queryset
+
+    def get_geo_places(self, data):
+        """IDs of places matching the radius and/or bbox filters (None when absent)"""
+        places = Place.objects.filter(is_active=True)
+        place_ids = None
+        if 'radius_km' in data:
+            place_ids = set(geo.places_within(places, data['lat'], data['lng'], data['radius_km']))
+        if data.get('bbox'):
+            west, south, east, north = data['bbox']
+            in_box = set(geo.places_in_bbox(places, south, west, north, east))
+            place_ids = in_box if place_ids is None else place_ids & in_box
+        return sorted(place_ids) if place_ids is not None else None
+
+    def filter_taxonomy(self, queryset, name, ids, match):
+        """
+        Images tagged with any/all of the given topic or place IDs
+
+        Catalog rows test their indexed ID arrays (&& / @>); images use one
+        EXISTS per condition on the M2M table, so rows are never duplicated.
+        """
+        if queryset.model is CatalogEntry:
+            lookup = 'overlap' if match == 'any' else 'contains'
+            return queryset.filter(**{f"{name}_ids__{lookup}": ids})
+
+        through = getattr(Image, f"{name}s").through
+        links = through.objects.filter(image_id=OuterRef('pk'))
+        if match == 'any':
+            return queryset.filter(Exists(links.filter(**{f"{name}_id__in": ids})))
+        for value in ids:
+            queryset = queryset.filter(Exists(links.filter(**{f"{name}_id": value})))
+        return queryset
+
+    def get_facets(self, request, data, queryset=None):
+        """Facet counts over the filtered set, cached for the public catalog"""
+        cache_key = (
+            search_cache.get_facets_cache_key(data)
+            if search_cache.is_cacheable(request) else None
+        )
+        if cache_key:
+            facets = search_cache.get_facets(cache_key)
+            if facets is not None:
+                return facets
+
+        if queryset is None:
+            queryset = self.filter_search(self.get_queryset(), data)
+        facets = compute_facets(queryset)
+
+        if cache_key:
+            search_cache.set_facets(cache_key, facets)
+        return facets
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Search images with full-text search"""
+        search_serializer = SearchSerializer(data=request.query_params)
+        if not search_serializer.is_valid():
+            return Response(search_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = search_serializer.validated_data
+        with_facets = data.get('facets', False)
+
+        # Public catalog pages are served from the result cache when possible
+        cache_key = search_cache.get_cache_key(data, request) if search_cache.is_cacheable(request) else None
+        if cache_key:
+            cached = search_cache.get_page(cache_key)
+            if cached is not None:
+                images = search_cache.load_images(cached['ids'])
+                serializer = self.get_serializer(images, many=True)
+                payload = {**cached['meta'], 'results': serializer.data}
+                if with_facets:
+                    payload['facets'] = self.get_facets(request, data)
+                return Response(payload)
+
+        queryset = self.filter_search(self.get_queryset(), data)
+
         # Paginate
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = ImageListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        serializer = ImageListSerializer(queryset, many=True)
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+            if cache_key:
+                meta = {key: value for key, value in response.data.items() if key != 'results'}
+                search_cache.set_page(cache_key, page, meta)
+            if with_facets:
+                response.data['facets'] = self.get_facets(request, data, queryset)
+            return response
+
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='map')
+    def map_pins(self, request):
+        """Places with matching images inside a map viewport, with image counts"""
+        serializer = MapPinsSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        cache_key = (
+            search_cache.get_facets_cache_key(data, prefix='pins')
+            if search_cache.is_cacheable(request) else None
+        )
+        if cache_key:
+            pins = search_cache.get_facets(cache_key)
+            if pins is not None:
+                return Response({'results': pins})
+
+        place_ids = self.get_geo_places(data)
+        if not place_ids:
+            # No place in the viewport: nothing to pin (and nothing to count)
+            return Response({'results': []})
+
+        counts = count_by_place(self.filter_search(self.get_queryset(), data), place_ids)
+        places = Place.objects.filter(id__in=list(counts)).values('id', 'name', 'latitude', 'longitude')
+        pins = [
+            {
+                'place_id': place['id'],
+                'name': place['name'],
+                'latitude': float(place['latitude']),
+                'longitude': float(place['longitude']),
+                'count': counts[place['id']],
+            }
+            for place in places
+        ]
+
+        if cache_key:
+            search_cache.set_facets(cache_key, pins)
+        return Response({'results': pins})
+
+    @action(detail=False, methods=['get'], url_path='top-keywords')
+    def top_keywords(self, request):
+        """Most used keywords among the images matching the search filters"""
+        serializer = TopKeywordsSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        cache_key = (
+            search_cache.get_facets_cache_key(data, prefix='keywords')
+            if search_cache.is_cacheable(request) else None
+        )
+        if cache_key:
+            keywords = search_cache.get_facets(cache_key)
+            if keywords is not None:
+                return Response({'results': keywords})
+
+        queryset = self.filter_search(self.get_queryset(), data)
+        keywords = count_keywords(queryset, language=data.get('language'), limit=data['limit'])
+
+        if cache_key:
+            search_cache.set_facets(cache_key, keywords)
+        return Response({'results': keywords})
+
 
 class ReviewViewSet(viewsets.ModelViewSet):
     """ViewSet for Review management"""
@@ -299,9 +604,15 @@ class ReviewViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        images = Image.objects.filter(status__in=['submitted', 'in_review'])
-        serializer = ImageListSerializer(images, many=True)
-        return Response(serializer.data)
+        images = (Image.objects.filter(status__in=['submitted', 'in_review'])
+                  .select_related('category')
+                  .order_by('created_at', 'id'))
+
+        # Oldest first, paged by keyset
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(images, request, view=self)
+        serializer = ImageListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=['post'], url_path='(?P<image_id>[^/.]+)/approve')
     def approve(self, request, image_id=None):
@@ -332,6 +643,10 @@ class ReviewViewSet(viewsets.ModelViewSet):
         image.status = 'published'
         image.published_at = timezone.now()
         image.save()
+        catalog.refresh_catalog([image.id])
+        search_cache.bump_catalog_generation()
+        suggestions.publish_image_terms(image)
+        events.emit_images([image], event='published')
 
         # Create review record
         review = Review.objects.create(
@@ -374,8 +689,13 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         # Update image status
+        was_published = image.status == 'published'
         image.status = 'rejected'
         image.save()
+        if was_published:
+            catalog.refresh_catalog([image.id])
+            search_cache.bump_catalog_generation()
+            events.emit_images([image], event='unpublished')
 
         # Create review record
         review = Review.objects.create(
@@ -394,7 +714,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
 class UploadTaskViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for UploadTask (read-only)"""
-    queryset = UploadTask.objects.all()
+    queryset = UploadTask.objects.select_related('image__category')
     serializer_class = UploadTaskSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -406,3 +726,324 @@ class UploadTaskViewSet(viewsets.ReadOnlyModelViewSet):
             return self.queryset
         
         return self.queryset.filter(uploader_id=user_id)
+
+
+class BulkIngestViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for BulkIngest progress (read-only)"""
+    queryset = BulkIngest.objects.all()
+    serializer_class = BulkIngestSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user_id = self.request.META.get('HTTP_X_USER_ID')
+        user_role = self.request.META.get('HTTP_X_USER_ROLE')
+
+        if user_role == 'admin':
+            return self.queryset
+
+        return self.queryset.filter(uploader_id=user_id)
+
+
+class UploadSessionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Resumable chunked uploads
+
+    POST creates a session, PUT chunk/ writes a byte range (in any order,
+    in parallel), GET returns the received ranges and contiguous offset,
+    POST finalize/ assembles the UploadTask. Each uploader may hold
+    UPLOAD_SESSION_MAX_OPEN open sessions totalling at most
+    UPLOAD_SESSION_MAX_OPEN_BYTES; sessions without a chunk for
+    UPLOAD_SESSION_TTL are expired by expire_upload_sessions.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+    def get_queryset(self):
+        user_id = self.request.META.get('HTTP_X_USER_ID')
+        return self.queryset.filter(uploader_id=user_id)
+
+    def create(self, request):
+        """Start a resumable upload"""
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        user_id = request.META.get('HTTP_X_USER_ID')
+        user_email = request.META.get('HTTP_X_USER_EMAIL')
+        user_role = request.META.get('HTTP_X_USER_ROLE')
+
+        if not user_id or not user_email:
+            return Response(
+                {'error': 'User authentication required'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        if data['type'] == 'infographie' and user_role != 'infographiste':
+            return Response(
+                {'error': 'Only infographistes can upload infographie type'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        if data['size'] > settings.UPLOAD_SESSION_MAX_SIZE:
+            return Response(
+                {'error': f"File exceeds the maximum size of {settings.UPLOAD_SESSION_MAX_SIZE} bytes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            # One creation at a time per uploader, so the caps hold under concurrency
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f"upload_sessions:{user_id}"])
+            opened = UploadSession.objects.filter(uploader_id=user_id, status='open').aggregate(
+                count=Count('id'), size=Sum('total_size')
+            )
+            if opened['count'] >= settings.UPLOAD_SESSION_MAX_OPEN:
+                return Response(
+                    {'error': f"At most {settings.UPLOAD_SESSION_MAX_OPEN} open upload sessions; "
+                              f"finish or abort one first"},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+            if (opened['size'] or 0) + data['size'] > settings.UPLOAD_SESSION_MAX_OPEN_BYTES:
+                return Response(
+                    {'error': f"Open upload sessions may hold at most "
+                              f"{settings.UPLOAD_SESSION_MAX_OPEN_BYTES} bytes; finish or abort one first"},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+
+            session = UploadSession(
+                uploader_id=user_id,
+                uploader_email=user_email,
+                original_filename=os.path.basename(data['filename']),
+                type=data['type'],
+                total_size=data['size'],
+                chunk_size=settings.UPLOAD_SESSION_CHUNK_SIZE,
+                expected_md5=data.get('md5', '').lower(),
+            )
+            session.temp_path = os.path.join(settings.UPLOAD_SESSION_DIR, f"{session.id}.part")
+            # A file orphaned by a failed save is removed by expire_upload_sessions
+            preallocate_file(session.temp_path, session.total_size)
+            session.save()
+
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        """Write one byte range (Content-Range: bytes start-end/total)"""
+        session = self.get_object()
+        if session.status != 'open':
+            return Response(
+                {'error': f"Upload session is {session.status}"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        match = self.CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not match:
+            return Response(
+                {'error': 'Content-Range header required (bytes start-end/total)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end, total = (int(value) for value in match.groups())
+        length = end - start + 1
+        if total != session.total_size or start > end or end >= total or length > session.chunk_size:
+            return Response(
+                {'error': 'Invalid byte range'},
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+
+        # Stream the body straight to its offset in the preallocated file
+        try:
+            chunk_md5 = write_range(session.temp_path, request.stream, start, length)
+        except FileNotFoundError:
+            # Finalized, aborted or expired while this chunk was in flight
+            return Response(
+                {'error': 'Upload session is no longer open'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except (ValueError, AttributeError):
+            return Response(
+                {'error': 'Chunk body shorter than its Content-Range'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        expected_md5 = request.META.get('HTTP_CONTENT_MD5', '').lower()
+        if expected_md5 and expected_md5 != chunk_md5:
+            return Response(
+                {'error': 'Chunk checksum mismatch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Merge the range under a row lock so parallel chunks don't lose updates,
+        # and only into a session that is still open
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != 'open':
+                return Response(
+                    {'error': f"Upload session is {session.status}"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            session.received_ranges = merge_range(session.received_ranges, start, end + 1)
+            session.received_bytes = sum(range_end - range_start for range_start, range_end in session.received_ranges)
+            session.expires_at = upload_session_expiry()
+            session.save(update_fields=['received_ranges', 'received_bytes', 'expires_at', 'updated_at'])
+
+        return Response(UploadSessionSerializer(session).data)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Assemble the upload and hand it to the processing pipeline"""
+        with transaction.atomic():
+            session = self.get_queryset().select_for_update().get(pk=self.get_object().pk)
+            if session.status != 'open':
+                return Response(
+                    {'error': f"Upload session is {session.status}"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if not session.is_complete:
+                return Response(
+                    {
+                        'error': 'Upload is incomplete',
+                        'received_ranges': session.received_ranges,
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            ingest = hash_file(session.temp_path)
+            if session.expected_md5 and session.expected_md5 != ingest['md5']:
+                return Response(
+                    {'error': 'File checksum mismatch'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Same filesystem: atomic rename into permanent storage
+            rel_path = build_upload_path(session.uploader_id, session.original_filename)
+            full_path = os.path.join(settings.STORAGE_ROOT, rel_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.rename(session.temp_path, full_path)
+
+            if is_zip_filename(session.original_filename):
+                bulk = BulkIngest.objects.create(
+                    uploader_id=session.uploader_id,
+                    uploader_email=session.uploader_email,
+                    type=session.type,
+                    original_filename=session.original_filename,
+                    file_path=rel_path,
+                )
+                session.status = 'finalized'
+                session.bulk_ingest = bulk
+                session.save(update_fields=['status', 'bulk_ingest', 'updated_at'])
+                transaction.on_commit(lambda: ingest_zip.delay(bulk.id))
+                return Response({
+                    'message': 'Bulk upload initiated',
+                    'bulk_ingest_id': bulk.id
+                }, status=status.HTTP_202_ACCEPTED)
+
+            ingest = probe_result(ingest, full_path)
+
+            upload_task = UploadTask.objects.create(
+                uploader_id=session.uploader_id,
+                original_filename=session.original_filename,
+                file_path=rel_path,
+                status='pending',
+                **ingest
+            )
+
+            session.status = 'finalized'
+            session.upload_task = upload_task
+            session.save(update_fields=['status', 'upload_task', 'updated_at'])
+
+            transaction.on_commit(lambda: process_upload.delay(upload_task.id))
+
+        return Response({
+            'message': 'Upload initiated',
+            'upload_task_id': upload_task.id
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def abort(self, request, pk=None):
+        """Abort an open upload and release its temp file"""
+        with transaction.atomic():
+            session = self.get_queryset().select_for_update().get(pk=self.get_object().pk)
+            if session.status != 'open':
+                return Response(
+                    {'error': f"Upload session is {session.status}"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            session.status = 'aborted'
+            session.save(update_fields=['status', 'updated_at'])
+
+        if os.path.exists(session.temp_path):
+            os.remove(session.temp_path)
+
+        return Response({'message': 'Upload aborted'})
+
+
+class SuggestionViewSet(viewsets.ViewSet):
+    """Search-box autocomplete over keywords, titles and taxonomy names"""
+    permission_classes = [permissions.AllowAny]
+
+    def list(self, request):
+        serializer = SuggestionQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        results, fuzzy = suggestions.suggest(
+            data['q'],
+            kinds=data.get('kind') or None,
+            limit=data['limit']
+        )
+        return Response({
+            'query': data['q'],
+            'fuzzy': fuzzy,
+            'results': results
+        })
+
+
+class InternalServicePermission(permissions.BasePermission):
+    """Service-to-service calls carrying the shared INTERNAL_SERVICE_TOKEN"""
+
+    def has_permission(self, request, view):
+        token = request.META.get('HTTP_X_INTERNAL_TOKEN', '')
+        return bool(settings.INTERNAL_SERVICE_TOKEN) and hmac.compare_digest(
+            token, settings.INTERNAL_SERVICE_TOKEN
+        )
+
+
+class ImageSnapshotViewSet(viewsets.ViewSet):
+    """Published image snapshots for bootstrapping the order service's catalog replica"""
+    authentication_classes = []
+    permission_classes = [InternalServicePermission]
+
+    def list(self, request):
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = min(int(request.query_params.get('limit', 500)), 2000)
+        except ValueError:
+            return Response(
+                {'error': 'after and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Image.objects.filter(status='published').order_by('id').only(
+            'id', 'filename', 'status', 'type', 'category_id', 'uploader_id', 'updated_at'
+        )
+
+        # Batch lookup (?ids=1,2,3) for images the replica has not seen yet
+        raw_ids = request.query_params.get('ids')
+        if raw_ids:
+            ids = [int(part) for part in raw_ids.split(',') if part.strip().isdigit()][:limit]
+            images = list(queryset.filter(id__in=ids))
+            return Response({
+                'results': [events.image_snapshot(image) for image in images],
+                'next_after': None
+            })
+
+        images = list(queryset.filter(id__gt=after)[:limit])
+        return Response({
+            'results': [events.image_snapshot(image) for image in images],
+            'next_after': images[-1].id if len(images) == limit else None
+        })
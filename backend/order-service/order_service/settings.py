@@ -135,3 +135,32 @@ PAYMENT_SANDBOX_MODE = os.getenv('PAYMENT_SANDBOX_MODE', 'True') == 'True'
 
 # Download token expiry (in hours)
 DOWNLOAD_TOKEN_EXPIRY_HOURS = 24
+
+# Internal services
+IMAGE_SERVICE_URL = os.getenv('IMAGE_SERVICE_URL', 'http://localhost:8002')
+IMAGE_SERVICE_POOL_SIZE = int(os.getenv('IMAGE_SERVICE_POOL_SIZE', 20))  # Keep-alive connections
+IMAGE_SERVICE_CONNECT_TIMEOUT = float(os.getenv('IMAGE_SERVICE_CONNECT_TIMEOUT', 0.5))  # seconds
+IMAGE_SERVICE_READ_TIMEOUT = float(os.getenv('IMAGE_SERVICE_READ_TIMEOUT', 2))  # seconds
+IMAGE_SERVICE_RETRIES = int(os.getenv('IMAGE_SERVICE_RETRIES', 2))
+IMAGE_SERVICE_BACKOFF = float(os.getenv('IMAGE_SERVICE_BACKOFF', 0.1))  # 0.1s, 0.2s, ...
+IMAGE_SERVICE_BREAKER_THRESHOLD = int(os.getenv('IMAGE_SERVICE_BREAKER_THRESHOLD', 5))  # Consecutive failures
+IMAGE_SERVICE_BREAKER_RESET = float(os.getenv('IMAGE_SERVICE_BREAKER_RESET', 30))  # seconds open
+
+# Service-to-service calls (image change events, catalog sync)
+INTERNAL_SERVICE_TOKEN = os.getenv('INTERNAL_SERVICE_TOKEN', '')  # Internal endpoints refuse all calls when empty
+
+# Local catalog replica (catalog_images)
+CATALOG_REMOTE_FALLBACK = os.getenv('CATALOG_REMOTE_FALLBACK', 'True') == 'True'  # Ask the image service for unknown images
+CATALOG_SYNC_PAGE_SIZE = int(os.getenv('CATALOG_SYNC_PAGE_SIZE', 1000))
+
+# Image facts cache (per process)
+IMAGE_CACHE_SIZE = int(os.getenv('IMAGE_CACHE_SIZE', 5000))
+IMAGE_CACHE_TTL = int(os.getenv('IMAGE_CACHE_TTL', 300))  # seconds
+IMAGE_CACHE_STALE_TTL = int(os.getenv('IMAGE_CACHE_STALE_TTL', 3600))  # Served while the service is down
+IMAGE_CACHE_MISS_TTL = int(os.getenv('IMAGE_CACHE_MISS_TTL', 30))  # seconds an unknown/unpublished id is not re-asked
+
+# Pricing: compiled price book per process, recompiled when pricing_version moves
+PRICING_VERSION_CHECK_INTERVAL = float(os.getenv('PRICING_VERSION_CHECK_INTERVAL', 5))  # seconds
+
+# Cart checkout
+CHECKOUT_MAX_ITEMS = int(os.getenv('CHECKOUT_MAX_ITEMS', 100))
@@ -4,7 +4,8 @@ Admin configuration for orders app
 from django.contrib import admin
 from .models import (
     UserWallet, WalletTransaction, TopUpRequest,
-    SubscriptionPlan, UserSubscription, Order, PaymentLog
+    SubscriptionPlan, UserSubscription, Order, PaymentLog, CatalogImage,
+    LicensePrice, PriceOverride, VolumeDiscount
 )
 
 
@@ -45,7 +46,7 @@ class TopUpRequestAdmin(admin.ModelAdmin):
 
 @admin.register(SubscriptionPlan)
 class SubscriptionPlanAdmin(admin.ModelAdmin):
-    list_display = ['name', 'duration_days', 'price', 'quota_credits', 'is_active', 'order']
+    list_display = ['name', 'duration_days', 'price', 'quota_credits', 'discount_percent', 'is_active', 'order']
     list_filter = ['is_active', 'is_trial']
     prepopulated_fields = {'slug': ('name',)}
 
@@ -69,3 +70,29 @@ class PaymentLogAdmin(admin.ModelAdmin):
     list_display = ['provider', 'reference', 'amount', 'status', 'created_at']
     list_filter = ['provider', 'log_type', 'status', 'created_at']
     search_fields = ['reference']
+
+
+@admin.register(CatalogImage)
+class CatalogImageAdmin(admin.ModelAdmin):
+    list_display = ['image_id', 'filename', 'status', 'type', 'version', 'synced_at']
+    list_filter = ['status', 'type']
+    search_fields = ['image_id', 'filename']
+
+
+@admin.register(LicensePrice)
+class LicensePriceAdmin(admin.ModelAdmin):
+    list_display = ['license_type', 'image_type', 'amount', 'is_active', 'updated_at']
+    list_filter = ['license_type', 'image_type', 'is_active']
+
+
+@admin.register(PriceOverride)
+class PriceOverrideAdmin(admin.ModelAdmin):
+    list_display = ['scope', 'scope_id', 'license_type', 'amount', 'is_active', 'updated_at']
+    list_filter = ['scope', 'license_type', 'is_active']
+    search_fields = ['scope_id']
+
+
+@admin.register(VolumeDiscount)
+class VolumeDiscountAdmin(admin.ModelAdmin):
+    list_display = ['min_items', 'discount_percent', 'is_active', 'updated_at']
+    list_filter = ['is_active']
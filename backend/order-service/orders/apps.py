@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        from .models import LicensePrice, PriceOverride, VolumeDiscount, SubscriptionPlan
+        from .pricing import bump_version
+        for model in (LicensePrice, PriceOverride, VolumeDiscount, SubscriptionPlan):
+            post_save.connect(bump_version, sender=model, dispatch_uid=f'pricing-save-{model.__name__}')
+            post_delete.connect(bump_version, sender=model, dispatch_uid=f'pricing-delete-{model.__name__}')
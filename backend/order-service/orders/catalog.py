@@ -0,0 +1,78 @@
+"""
+Local catalog replica (catalog_images)
+
+The image service posts a versioned snapshot whenever an image is
+published, archived, rejected, edited or deleted; sync_catalog_images
+bootstraps and repairs the table. Orders are validated against it with a
+primary-key lookup instead of a call to the image service.
+"""
+from django.conf import settings
+from django.db import connection
+import json
+from .image_client import ImageServiceUnavailable, get_images
+from .models import CatalogImage
+from .serializers import ImageEventSerializer
+
+# Last writer by version wins: replayed or reordered events never roll a row back.
+# Equal versions still match so a resync refreshes synced_at.
+UPSERT_SQL = """
+INSERT INTO catalog_images
+    (image_id, filename, status, type, category_id, photographer_id, licenses, version, synced_at)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, now())
+ON CONFLICT (image_id) DO UPDATE
+   SET filename = EXCLUDED.filename,
+       status = EXCLUDED.status,
+       type = EXCLUDED.type,
+       category_id = EXCLUDED.category_id,
+       photographer_id = EXCLUDED.photographer_id,
+       licenses = EXCLUDED.licenses,
+       version = EXCLUDED.version,
+       synced_at = now()
+ WHERE catalog_images.version <= EXCLUDED.version
+"""
+
+
+def _row(snapshot):
+    if snapshot['event'] == 'deleted':
+        return (snapshot['image_id'], '', 'deleted', '', None, None, '[]', snapshot['version'])
+    return (
+        snapshot['image_id'],
+        snapshot['filename'],
+        snapshot['status'],
+        snapshot['type'],
+        snapshot['category_id'],
+        snapshot['photographer_id'],
+        json.dumps(snapshot['licenses']),
+        snapshot['version'],
+    )
+
+
+def apply_snapshots(snapshots):
+    """Upsert validated image snapshots; returns how many were received"""
+    if not snapshots:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.executemany(UPSERT_SQL, [_row(snapshot) for snapshot in snapshots])
+    return len(snapshots)
+
+
+def get_sellable_images(image_ids):
+    """
+    {image_id: CatalogImage} for the published images among image_ids
+
+    One primary-key lookup on the replica. Images it has never heard of
+    (e.g. before the first sync) are fetched as snapshots from the image
+    service when CATALOG_REMOTE_FALLBACK is on, and saved like any other
+    event so they are priced from the same facts (category, photographer,
+    licenses). Without an INTERNAL_SERVICE_TOKEN they are treated as
+    unknown. May raise ImageServiceUnavailable.
+    """
+    images = CatalogImage.objects.in_bulk(image_ids)
+    missing = [image_id for image_id in image_ids if image_id not in images]
+    if missing and settings.CATALOG_REMOTE_FALLBACK and settings.INTERNAL_SERVICE_TOKEN:
+        serializer = ImageEventSerializer(data=list(get_images(missing).values()), many=True)
+        if not serializer.is_valid():
+            raise ImageServiceUnavailable(f"Invalid image snapshots: {serializer.errors}")
+        if apply_snapshots(serializer.validated_data):
+            images.update(CatalogImage.objects.in_bulk(missing))
+    return {image_id: image for image_id, image in images.items() if image.status == 'published'}
@@ -0,0 +1,194 @@
+"""
+Internal client for the image service
+
+One pooled keep-alive session per process, strict connect/read timeouts,
+retries with backoff on idempotent GETs, and a circuit breaker that fails
+fast while the image service is unhealthy. Images are fetched as the same
+snapshots the image service posts to the catalog replica (filename,
+status, type, category, photographer, licenses), from its internal
+snapshot endpoint; they are kept in a small TTL cache and served stale
+when the service is unavailable. Images the service does not return
+(unknown or unpublished) are remembered for IMAGE_CACHE_MISS_TTL seconds.
+Any answer other than 200, including a rejected internal token, counts
+as a failure for the breaker.
+"""
+from collections import OrderedDict
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import requests
+import threading
+import time
+
+class ImageServiceUnavailable(Exception):
+    """The image service is down, timing out, or the circuit is open"""
+
+
+class CircuitBreaker:
+    """Open after consecutive failures; let one trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self.trial_in_flight:
+                self.trial_in_flight = True  # Half-open
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class TTLCache:
+    """Small thread-safe LRU of {key: (stored_at, value)}"""
+
+    def __init__(self, max_size, ttl, stale_ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, allow_stale=False):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age > (self.stale_ttl if allow_stale else self.ttl):
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+def _build_session():
+    retry = Retry(
+        total=settings.IMAGE_SERVICE_RETRIES,
+        backoff_factor=settings.IMAGE_SERVICE_BACKOFF,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=['GET'],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.IMAGE_SERVICE_POOL_SIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_session = _build_session()
+_breaker = CircuitBreaker(
+    settings.IMAGE_SERVICE_BREAKER_THRESHOLD,
+    settings.IMAGE_SERVICE_BREAKER_RESET
+)
+_cache = TTLCache(
+    settings.IMAGE_CACHE_SIZE,
+    settings.IMAGE_CACHE_TTL,
+    settings.IMAGE_CACHE_STALE_TTL
+)
+_misses = TTLCache(
+    settings.IMAGE_CACHE_SIZE,
+    settings.IMAGE_CACHE_MISS_TTL,
+    settings.IMAGE_CACHE_MISS_TTL
+)
+
+
+def _fetch(image_ids):
+    """{image_id: snapshot} for published images, in one request"""
+    if not _breaker.allow():
+        raise ImageServiceUnavailable('Image service circuit open')
+    try:
+        response = _session.get(
+            f"{settings.IMAGE_SERVICE_URL}/api/internal/image-snapshots/",
+            params={'ids': ','.join(map(str, image_ids)), 'limit': len(image_ids)},
+            headers={'X-Internal-Token': settings.INTERNAL_SERVICE_TOKEN},
+            timeout=(settings.IMAGE_SERVICE_CONNECT_TIMEOUT, settings.IMAGE_SERVICE_READ_TIMEOUT)
+        )
+    except requests.RequestException as e:
+        _breaker.record_failure()
+        raise ImageServiceUnavailable(str(e))
+
+    if response.status_code in (401, 403):
+        # Misconfigured INTERNAL_SERVICE_TOKEN: fail fast until it is fixed
+        _breaker.record_failure()
+        raise ImageServiceUnavailable(f"Image service rejected the internal token ({response.status_code})")
+    if response.status_code != 200:
+        _breaker.record_failure()
+        raise ImageServiceUnavailable(f"Image service returned {response.status_code}")
+    _breaker.record_success()
+
+    return {snapshot['image_id']: snapshot for snapshot in response.json().get('results', [])}
+
+
+def get_images(image_ids):
+    """
+    {image_id: snapshot} for the published images among image_ids
+
+    Cached snapshots are used when fresh, and recent misses are not asked
+    again; the rest are fetched in one request. When the service is
+    unavailable, stale cached snapshots are served if every image has one,
+    otherwise ImageServiceUnavailable is raised.
+    """
+    image_ids = list(dict.fromkeys(image_ids))
+    found = {}
+    missing = []
+    for image_id in image_ids:
+        facts = _cache.get(image_id)
+        if facts is not None:
+            found[image_id] = facts
+        elif _misses.get(image_id) is None:
+            missing.append(image_id)
+    if not missing:
+        return found
+
+    try:
+        fetched = _fetch(missing)
+    except ImageServiceUnavailable:
+        stale = {image_id: _cache.get(image_id, allow_stale=True) for image_id in missing}
+        if any(facts is None for facts in stale.values()):
+            raise
+        found.update(stale)
+        return found
+
+    for image_id, facts in fetched.items():
+        _cache.set(image_id, facts)
+    for image_id in missing:
+        if image_id not in fetched:
+            _misses.set(image_id, True)
+    found.update(fetched)
+    return found
+
+
+def get_image(image_id):
+    """Snapshot of one published image, or None"""
+    return get_images([image_id]).get(image_id)
@@ -0,0 +1,57 @@
+"""
+Time cart quotes against a synthetic price book with many override rules
+
+The book is built in memory (no database), so the numbers isolate the
+per-item lookup cost from query time.
+"""
+from django.core.management.base import BaseCommand
+from decimal import Decimal
+import random
+import time
+from orders.models import CatalogImage
+from orders.pricing import DEFAULT_PRICES, PriceBook
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PriceBook.quote with thousands of override rules'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overrides', type=int, default=10000)
+        parser.add_argument('--cart-size', type=int, default=100)
+        parser.add_argument('--quotes', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        licenses = list(DEFAULT_PRICES)
+        base = {(license_type, ''): amount for license_type, amount in DEFAULT_PRICES.items()}
+        overrides = {'photographer': {}, 'category': {}}
+        for _ in range(options['overrides']):
+            scope = rng.choice(list(overrides))
+            key = (rng.randrange(options['overrides']), rng.choice(licenses + ['']))
+            overrides[scope][key] = Decimal(rng.randrange(100, 10000))
+        tiers = [(5, Decimal('5')), (20, Decimal('10')), (50, Decimal('15'))]
+        book = PriceBook(0, base, overrides, tiers, {1: Decimal('10')})
+
+        carts = [
+            [
+                (CatalogImage(
+                    image_id=rng.randrange(10 ** 6),
+                    type=rng.choice(['photo', 'infographie']),
+                    category_id=rng.randrange(options['overrides']),
+                    photographer_id=rng.randrange(options['overrides'])
+                ), rng.choice(licenses))
+                for _ in range(options['cart_size'])
+            ]
+            for _ in range(options['quotes'])
+        ]
+
+        started = time.perf_counter()
+        for cart in carts:
+            book.quote(cart, plan_id=1)
+        elapsed = time.perf_counter() - started
+
+        items = options['quotes'] * options['cart_size']
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['quotes']} quotes of {options['cart_size']} items with {options['overrides']} overrides: "
+            f"{elapsed * 1000 / options['quotes']:.3f} ms/quote, {elapsed * 10 ** 6 / items:.2f} us/item"
+        ))
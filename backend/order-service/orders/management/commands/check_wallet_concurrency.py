@@ -0,0 +1,104 @@
+"""
+Hammer a scratch wallet with concurrent debits and credits and check for drift
+
+Every worker thread uses its own database connection. At the end the
+wallet balance must equal the opening balance plus the ledger's credits
+minus its debits, the ledger must hold exactly the operations that
+succeeded, and no recorded balance may be negative.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Min, Sum
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import random
+from orders.models import UserWallet, WalletTransaction
+
+
+def _run_worker(wallet_id, operations, seed):
+    """Random debits/credits; returns (credited, debited, succeeded, rejected)"""
+    rng = random.Random(seed)
+    wallet = UserWallet.objects.get(id=wallet_id)
+    credited = debited = Decimal('0')
+    succeeded = rejected = 0
+    try:
+        for _ in range(operations):
+            amount = Decimal(rng.randint(1, 50))
+            if rng.random() < 0.3:
+                wallet.add_balance(amount, 'Concurrency check credit')
+                credited += amount
+                succeeded += 1
+            else:
+                try:
+                    wallet.deduct_balance(amount, 'Concurrency check debit')
+                    debited += amount
+                    succeeded += 1
+                except ValueError:
+                    rejected += 1
+        return credited, debited, succeeded, rejected
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Stress wallet debits/credits from concurrent connections and verify zero drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent connections')
+        parser.add_argument('--operations', type=int, default=200, help='Operations per worker')
+        parser.add_argument('--opening-balance', type=int, default=1000)
+        parser.add_argument('--user-id', type=int, default=-1, help='Scratch wallet user_id')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch wallet afterwards')
+
+    def handle(self, *args, **options):
+        if UserWallet.objects.filter(user_id=options['user_id']).exists():
+            raise CommandError(f"A wallet already exists for user_id {options['user_id']}")
+
+        opening = Decimal(options['opening_balance'])
+        wallet = UserWallet.objects.create(
+            user_id=options['user_id'],
+            user_email='wallet-check@localhost',
+            balance=opening
+        )
+        connection.close()
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                futures = [
+                    executor.submit(_run_worker, wallet.id, options['operations'], seed)
+                    for seed in range(options['workers'])
+                ]
+                results = [future.result() for future in futures]
+
+            credited = sum(result[0] for result in results)
+            debited = sum(result[1] for result in results)
+            succeeded = sum(result[2] for result in results)
+            rejected = sum(result[3] for result in results)
+
+            wallet.refresh_from_db()
+            ledger = WalletTransaction.objects.filter(wallet=wallet)
+            ledger_credits = ledger.filter(transaction_type='credit').aggregate(total=Sum('amount'))['total'] or 0
+            ledger_debits = ledger.filter(transaction_type='debit').aggregate(total=Sum('amount'))['total'] or 0
+            lowest = ledger.aggregate(lowest=Min('balance_after'))['lowest']
+
+            expected = opening + credited - debited
+            checks = [
+                ('balance matches successful operations', wallet.balance == expected),
+                ('balance matches ledger', wallet.balance == opening + ledger_credits - ledger_debits),
+                ('one ledger row per successful operation', ledger.count() == succeeded),
+                ('balance never negative', lowest is None or lowest >= 0),
+            ]
+
+            self.stdout.write(
+                f"{succeeded} operations applied, {rejected} debits rejected; "
+                f"balance {wallet.balance} (expected {expected})"
+            )
+            failed = [name for name, ok in checks if not ok]
+            for name, ok in checks:
+                self.stdout.write(f"  {'ok  ' if ok else 'FAIL'} {name}")
+            if failed:
+                raise CommandError(f"Wallet drift detected: {', '.join(failed)}")
+            self.stdout.write(self.style.SUCCESS('No drift'))
+        finally:
+            if not options['keep']:
+                UserWallet.objects.filter(id=wallet.id).delete()
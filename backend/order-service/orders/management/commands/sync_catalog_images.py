@@ -0,0 +1,59 @@
+"""
+Bootstrap or repair the local catalog replica from the image service
+
+Pages through every published image by id and upserts its snapshot. With
+--prune, replica rows still marked published that the image service did
+not return (missed unpublish/archive events) are marked unpublished.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+import requests
+from orders.catalog import apply_snapshots
+from orders.models import CatalogImage
+from orders.serializers import ImageEventSerializer
+
+
+class Command(BaseCommand):
+    help = 'Sync catalog_images with the published images of the image service'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=settings.CATALOG_SYNC_PAGE_SIZE)
+        parser.add_argument('--prune', action='store_true',
+                            help='Unpublish replica rows the image service no longer publishes')
+
+    def handle(self, *args, **options):
+        if not settings.INTERNAL_SERVICE_TOKEN:
+            raise CommandError('INTERNAL_SERVICE_TOKEN is not set')
+
+        started = timezone.now()
+        session = requests.Session()
+        after = 0
+        synced = 0
+        while after is not None:
+            try:
+                response = session.get(
+                    f"{settings.IMAGE_SERVICE_URL}/api/internal/image-snapshots/",
+                    params={'after': after, 'limit': options['page_size']},
+                    headers={'X-Internal-Token': settings.INTERNAL_SERVICE_TOKEN},
+                    timeout=(settings.IMAGE_SERVICE_CONNECT_TIMEOUT, 30)
+                )
+                response.raise_for_status()
+            except requests.RequestException as e:
+                raise CommandError(f"Image service request failed after id {after}: {e}")
+
+            page = response.json()
+            serializer = ImageEventSerializer(data=page['results'], many=True)
+            if not serializer.is_valid():
+                raise CommandError(f"Invalid snapshots after id {after}: {serializer.errors}")
+            synced += apply_snapshots(serializer.validated_data)
+            after = page['next_after']
+            self.stdout.write(f"  {synced} images synced")
+
+        self.stdout.write(self.style.SUCCESS(f"Synced {synced} published images"))
+
+        if options['prune']:
+            pruned = CatalogImage.objects.filter(
+                status='published', synced_at__lt=started
+            ).update(status='unpublished')
+            self.stdout.write(self.style.SUCCESS(f"Marked {pruned} stale images unpublished"))
@@ -1,11 +1,29 @@
 """
 Models for order service - wallets, subscriptions, orders
 """
-from django.db import models
+from django.db import models, connection
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 
+# Conditional balance change and its ledger row in one statement: the UPDATE
+# only matches when the balance covers the change, so concurrent debits can
+# never overdraw or lose an update, and no transaction row exists without
+# its balance change (or the reverse).
+WALLET_CHANGE_SQL = """
+WITH changed AS (
+    UPDATE user_wallets
+       SET balance = balance + %(delta)s, updated_at = now()
+     WHERE id = %(wallet_id)s AND balance + %(delta)s >= 0
+ RETURNING id, balance
+)
+INSERT INTO wallet_transactions
+       (wallet_id, transaction_type, amount, balance_after, description, reference, created_at)
+SELECT id, %(transaction_type)s, %(amount)s, balance, %(description)s, %(reference)s, now()
+  FROM changed
+RETURNING balance_after
+"""
+
 
 class UserWallet(models.Model):
     """User wallet for prepaid account balance"""
@@ -26,36 +44,41 @@ class UserWallet(models.Model):
     def __str__(self):
         return f"{self.user_email} - {self.balance} {self.currency}"
 
-    def add_balance(self, amount, description=''):
+    def change_balance(self, delta, transaction_type, amount, description='', reference=''):
+        """
+        Apply delta and record the transaction in one round trip
+
+        Returns the new balance, or None when the balance would go negative.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(WALLET_CHANGE_SQL, {
+                'wallet_id': self.id,
+                'delta': delta,
+                'transaction_type': transaction_type,
+                'amount': amount,
+                'description': description[:500],
+                'reference': reference[:100],
+            })
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        self.balance = row[0]
+        return self.balance
+
+    def add_balance(self, amount, description='', reference=''):
         """Add balance to wallet"""
-        self.balance += amount
-        self.save()
-        
-        # Create transaction record
-        WalletTransaction.objects.create(
-            wallet=self,
-            transaction_type='credit',
-            amount=amount,
-            balance_after=self.balance,
-            description=description
-        )
-
-    def deduct_balance(self, amount, description=''):
+        if amount < 0:
+            raise ValueError("Amount must not be negative")
+        return self.change_balance(amount, 'credit', amount, description, reference)
+
+    def deduct_balance(self, amount, description='', reference=''):
         """Deduct balance from wallet"""
-        if self.balance < amount:
+        if amount < 0:
+            raise ValueError("Amount must not be negative")
+        balance = self.change_balance(-amount, 'debit', amount, description, reference)
+        if balance is None:
             raise ValueError("Insufficient balance")
-        
-        self.balance -= amount
-        self.save()
-        
-        # Create transaction record
-        WalletTransaction.objects.create(
-            wallet=self,
-            transaction_type='debit',
-            amount=amount,
-            balance_after=self.balance,
-            description=description
-        )
+        return balance
 
     def has_sufficient_balance(self, amount):
         """Check if wallet has sufficient balance"""
@@ -142,6 +165,9 @@ class SubscriptionPlan(models.Model):
     
     # Features (JSON field for flexibility)
     features = models.JSONField(default=dict)
+
+    # Off image prices for active subscribers paying from their wallet
+    discount_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
     is_active = models.BooleanField(default=True)
     is_trial = models.BooleanField(default=False)
@@ -258,6 +284,7 @@ class Order(models.Model):
     ]
 
     order_number = models.CharField(max_length=50, unique=True, db_index=True)
+    checkout_reference = models.CharField(max_length=50, blank=True, db_index=True)  # Shared by a cart's orders
     
     # User info
     user_id = models.IntegerField(db_index=True)
@@ -300,6 +327,11 @@ class Order(models.Model):
     def __str__(self):
         return f"{self.order_number} - {self.user_email} - {self.payment_status}"
 
+    @staticmethod
+    def generate_checkout_reference():
+        """Generate unique checkout reference"""
+        return f"CHK-{timezone.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8].upper()}"
+
     @staticmethod
     def generate_order_number():
         """Generate unique order number"""
@@ -330,6 +362,98 @@ class Order(models.Model):
         self.save()
 
 
+class LicensePrice(models.Model):
+    """Base price of a license type, optionally for one image type only"""
+    license_type = models.CharField(max_length=20, choices=Order.LICENSE_TYPES)
+    image_type = models.CharField(max_length=20, blank=True)  # Blank: any image type
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'license_prices'
+        unique_together = ['license_type', 'image_type']
+
+    def __str__(self):
+        return f"{self.license_type} {self.image_type or '*'}: {self.amount}"
+
+
+class PriceOverride(models.Model):
+    """Fixed price for the images of a category or a photographer"""
+    SCOPES = [
+        ('photographer', 'Photographer'),
+        ('category', 'Category'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPES)
+    scope_id = models.BigIntegerField()  # Photographer user id or category id
+    license_type = models.CharField(max_length=20, choices=Order.LICENSE_TYPES, blank=True)  # Blank: all licenses
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'price_overrides'
+        unique_together = ['scope', 'scope_id', 'license_type']
+
+    def __str__(self):
+        return f"{self.scope} {self.scope_id} {self.license_type or '*'}: {self.amount}"
+
+
+class VolumeDiscount(models.Model):
+    """Discount on carts of at least min_items images"""
+    min_items = models.IntegerField(unique=True)
+    discount_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'volume_discounts'
+        ordering = ['min_items']
+
+    def __str__(self):
+        return f"{self.min_items}+ images: {self.discount_percent}%"
+
+
+class PricingVersion(models.Model):
+    """Single row bumped on every pricing change; workers recompile their price book when it moves"""
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pricing_version'
+
+    def __str__(self):
+        return f"Pricing v{self.version}"
+
+
+class CatalogImage(models.Model):
+    """Local replica of the sellable facts of an image, fed by image service events"""
+    image_id = models.BigIntegerField(primary_key=True)
+    filename = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=20)  # Image status, or 'deleted' (tombstone)
+    type = models.CharField(max_length=20, blank=True)
+    category_id = models.BigIntegerField(null=True, blank=True)
+    photographer_id = models.IntegerField(null=True, blank=True)
+    licenses = models.JSONField(default=list)  # License types on sale
+
+    # updated_at of the image in the image service; older events are ignored
+    version = models.DateTimeField()
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'catalog_images'
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"{self.image_id} - {self.filename} - {self.status}"
+
+    def is_sellable(self, license_type):
+        return self.status == 'published' and license_type in self.licenses
+
+
 class PaymentLog(models.Model):
     """Payment logs for reconciliation (payment module)"""
     LOG_TYPES = [
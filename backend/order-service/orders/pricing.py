@@ -0,0 +1,153 @@
+"""
+Pricing engine
+
+License prices, category and photographer overrides, volume tiers and
+subscription discounts are compiled into a PriceBook of plain dicts, so
+pricing a cart line is a few dictionary lookups however many rules exist.
+Each process keeps its compiled book and recompiles it when the
+pricing_version row moves; signals bump it on every rule change, and it
+is read at most every PRICING_VERSION_CHECK_INTERVAL seconds.
+"""
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.db.models import F
+import threading
+import time
+from .models import (
+    LicensePrice, PriceOverride, VolumeDiscount, PricingVersion,
+    SubscriptionPlan, UserSubscription
+)
+
+# Used for license types without an active LicensePrice
+DEFAULT_PRICES = {'standard': Decimal('500'), 'extended': Decimal('1500'), 'exclusive': Decimal('5000')}
+CURRENCY = 'DZD'
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+HUNDRED = Decimal('100')
+
+
+class PriceBook:
+    """Compiled pricing rules at one pricing version"""
+
+    def __init__(self, version, base, overrides, tiers, plan_discounts):
+        self.version = version
+        self.base = base  # {(license_type, image_type or ''): amount}
+        self.photographer = overrides['photographer']  # {(photographer_id, license_type or ''): amount}
+        self.category = overrides['category']  # {(category_id, license_type or ''): amount}
+        self.tier_sizes = [min_items for min_items, _ in tiers]
+        self.tier_percents = [percent for _, percent in tiers]
+        self.plan_discounts = plan_discounts  # {plan_id: percent}
+
+    def unit_price(self, image, license_type):
+        """List price of one image; the most specific rule wins"""
+        for rules, key in ((self.photographer, image.photographer_id), (self.category, image.category_id)):
+            if key is None:
+                continue
+            amount = rules.get((key, license_type))
+            if amount is None:
+                amount = rules.get((key, ''))
+            if amount is not None:
+                return amount
+        amount = self.base.get((license_type, image.type))
+        if amount is None:
+            amount = self.base[(license_type, '')]
+        return amount
+
+    def volume_percent(self, item_count):
+        index = bisect_right(self.tier_sizes, item_count)
+        return self.tier_percents[index - 1] if index else ZERO
+
+    def quote(self, lines, plan_id=None):
+        """
+        Price a cart of (image, license_type) lines
+
+        The volume and subscription discounts compound and are applied per
+        line, so the line amounts always add up to the total.
+        """
+        volume = self.volume_percent(len(lines))
+        subscription = self.plan_discounts.get(plan_id, ZERO)
+        factor = (1 - volume / HUNDRED) * (1 - subscription / HUNDRED)
+
+        priced = []
+        for image, license_type in lines:
+            list_price = self.unit_price(image, license_type)
+            priced.append({
+                'image_id': image.image_id,
+                'license_type': license_type,
+                'list_price': list_price,
+                'amount': (list_price * factor).quantize(CENT, rounding=ROUND_HALF_UP),
+            })
+        return {
+            'lines': priced,
+            'subtotal': sum((line['list_price'] for line in priced), ZERO),
+            'volume_discount_percent': volume,
+            'subscription_discount_percent': subscription,
+            'total': sum((line['amount'] for line in priced), ZERO),
+            'currency': CURRENCY,
+        }
+
+
+def compile_price_book(version):
+    base = {(license_type, ''): amount for license_type, amount in DEFAULT_PRICES.items()}
+    for license_type, image_type, amount in LicensePrice.objects.filter(is_active=True).values_list(
+        'license_type', 'image_type', 'amount'
+    ):
+        base[(license_type, image_type)] = amount
+
+    overrides = {scope: {} for scope, _ in PriceOverride.SCOPES}
+    for scope, scope_id, license_type, amount in PriceOverride.objects.filter(is_active=True).values_list(
+        'scope', 'scope_id', 'license_type', 'amount'
+    ):
+        overrides[scope][(scope_id, license_type)] = amount
+
+    tiers = list(
+        VolumeDiscount.objects.filter(is_active=True)
+        .order_by('min_items')
+        .values_list('min_items', 'discount_percent')
+    )
+    plan_discounts = dict(
+        SubscriptionPlan.objects.filter(discount_percent__gt=0).values_list('id', 'discount_percent')
+    )
+    return PriceBook(version, base, overrides, tiers, plan_discounts)
+
+
+_book = None
+_checked_at = float('-inf')
+_lock = threading.Lock()
+
+
+def current_version():
+    return PricingVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def get_price_book():
+    """This process's compiled price book, recompiled when the pricing version moved"""
+    global _book, _checked_at
+    now = time.monotonic()
+    if _book is not None and now - _checked_at < settings.PRICING_VERSION_CHECK_INTERVAL:
+        return _book
+
+    # Read the version before the rules, so a book is never tagged newer than its contents
+    version = current_version()
+    with _lock:
+        if _book is None or _book.version != version:
+            _book = compile_price_book(version)
+        _checked_at = now
+    return _book
+
+
+def bump_version(**kwargs):
+    """Signal receiver for pricing rule changes"""
+    global _checked_at
+    if not PricingVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        PricingVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    _checked_at = float('-inf')  # This process picks the change up on its next quote
+
+
+def subscriber_plan_id(user_id):
+    """Plan of the user's valid active subscription, or None"""
+    subscription = UserSubscription.objects.filter(user_id=user_id, status='active').first()
+    if subscription and subscription.is_valid():
+        return subscription.plan_id
+    return None
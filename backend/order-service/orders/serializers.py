@@ -2,6 +2,7 @@
 Serializers for Order service
 """
 from rest_framework import serializers
+from django.conf import settings
 from .models import (
     UserWallet, WalletTransaction, TopUpRequest,
     SubscriptionPlan, UserSubscription, Order, PaymentLog
@@ -61,6 +62,70 @@ class CreateOrderSerializer(serializers.Serializer):
     payment_method = serializers.ChoiceField(choices=['wallet', 'subscription'])
 
 
+class CheckoutItemSerializer(serializers.Serializer):
+    image_id = serializers.IntegerField()
+    license_type = serializers.ChoiceField(choices=['standard', 'extended', 'exclusive'])
+
+
+class QuoteSerializer(serializers.Serializer):
+    items = CheckoutItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > settings.CHECKOUT_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.CHECKOUT_MAX_ITEMS} images per checkout")
+        image_ids = [item['image_id'] for item in items]
+        if len(set(image_ids)) != len(image_ids):
+            raise serializers.ValidationError('Each image can only appear once')
+        return items
+
+
+class CheckoutSerializer(QuoteSerializer):
+    payment_method = serializers.ChoiceField(choices=['wallet', 'subscription'])
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    image_id = serializers.IntegerField()
+    filename = serializers.CharField()
+    license_type = serializers.CharField()
+    list_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class QuoteResultSerializer(serializers.Serializer):
+    """PriceBook.quote() output; amounts are rendered as strings, never floats"""
+    lines = QuoteLineSerializer(many=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    volume_discount_percent = serializers.DecimalField(max_digits=5, decimal_places=2)
+    subscription_discount_percent = serializers.DecimalField(max_digits=5, decimal_places=2)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    currency = serializers.CharField()
+
+
+class ImageEventSerializer(serializers.Serializer):
+    """Image snapshot posted by the image service"""
+    event = serializers.ChoiceField(choices=['published', 'updated', 'unpublished', 'archived', 'deleted'])
+    image_id = serializers.IntegerField()
+    version = serializers.DateTimeField()
+    filename = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+    status = serializers.CharField(max_length=20, required=False)
+    type = serializers.CharField(max_length=20, required=False, allow_blank=True, default='')
+    category_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    photographer_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    licenses = serializers.ListField(
+        child=serializers.ChoiceField(choices=['standard', 'extended', 'exclusive']),
+        required=False, default=list
+    )
+
+    def validate(self, data):
+        if data['event'] != 'deleted' and not data.get('status'):
+            raise serializers.ValidationError({'status': 'Required unless the image was deleted'})
+        return data
+
+
+class ImageEventBatchSerializer(serializers.Serializer):
+    events = ImageEventSerializer(many=True, allow_empty=False)
+
+
 class PaymentLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = PaymentLog
@@ -0,0 +1,185 @@
+"""
+Tests for the orders app
+"""
+from django.db import connection
+from django.db.models import Min, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+import random
+import threading
+from . import image_client
+from .catalog import get_sellable_images
+from .models import CatalogImage, UserWallet, WalletTransaction
+from .pricing import PriceBook
+from .serializers import QuoteResultSerializer
+
+WORKERS = 8
+OPERATIONS = 50
+
+
+def run_worker(wallet_id, operations, seed, start):
+    """Random debits/credits on a fresh connection; returns (credited, debited, succeeded)"""
+    rng = random.Random(seed)
+    credited = debited = Decimal('0')
+    succeeded = 0
+    try:
+        wallet = UserWallet.objects.get(id=wallet_id)
+        start.wait()
+        for _ in range(operations):
+            amount = Decimal(rng.randint(1, 50))
+            if rng.random() < 0.3:
+                wallet.add_balance(amount, 'Concurrency test credit')
+                credited += amount
+                succeeded += 1
+            else:
+                try:
+                    wallet.deduct_balance(amount, 'Concurrency test debit')
+                    debited += amount
+                    succeeded += 1
+                except ValueError:
+                    pass
+        return credited, debited, succeeded
+    finally:
+        connection.close()
+
+
+class WalletConcurrencyTests(TransactionTestCase):
+    """Concurrent debits and credits never drift or overdraw (same race as check_wallet_concurrency)"""
+
+    def setUp(self):
+        self.opening = Decimal('1000')
+        self.wallet = UserWallet.objects.create(
+            user_id=1, user_email='wallet@example.com', balance=self.opening
+        )
+
+    def race(self, worker, *args):
+        start = threading.Barrier(WORKERS)
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            futures = [
+                executor.submit(worker, self.wallet.id, *args, seed, start)
+                for seed in range(WORKERS)
+            ]
+            return [future.result() for future in futures]
+
+    def test_concurrent_operations_have_no_drift(self):
+        results = self.race(run_worker, OPERATIONS)
+        credited = sum(result[0] for result in results)
+        debited = sum(result[1] for result in results)
+        succeeded = sum(result[2] for result in results)
+
+        self.wallet.refresh_from_db()
+        ledger = WalletTransaction.objects.filter(wallet=self.wallet)
+        ledger_credits = ledger.filter(transaction_type='credit').aggregate(total=Sum('amount'))['total'] or 0
+        ledger_debits = ledger.filter(transaction_type='debit').aggregate(total=Sum('amount'))['total'] or 0
+
+        self.assertEqual(self.wallet.balance, self.opening + credited - debited)
+        self.assertEqual(self.wallet.balance, self.opening + ledger_credits - ledger_debits)
+        self.assertEqual(ledger.count(), succeeded)
+        self.assertGreaterEqual(ledger.aggregate(lowest=Min('balance_after'))['lowest'], 0)
+
+    def test_concurrent_debits_cannot_overdraw(self):
+        def debit_all(wallet_id, seed, start):
+            try:
+                wallet = UserWallet.objects.get(id=wallet_id)
+                start.wait()
+                wallet.deduct_balance(self.opening, 'Concurrency test debit')
+                return True
+            except ValueError:
+                return False
+            finally:
+                connection.close()
+
+        results = self.race(debit_all)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(self.wallet.balance, 0)
+        self.assertEqual(WalletTransaction.objects.filter(wallet=self.wallet).count(), 1)
+
+
+SNAPSHOT = {
+    'event': 'updated',
+    'image_id': 42,
+    'filename': 'final.jpg',
+    'status': 'published',
+    'type': 'photo',
+    'category_id': 7,
+    'photographer_id': 3,
+    'licenses': ['standard'],
+    'version': '2024-01-01T00:00:00+00:00',
+}
+
+
+@override_settings(CATALOG_REMOTE_FALLBACK=True, INTERNAL_SERVICE_TOKEN='secret')
+class CatalogFallbackTests(TestCase):
+    """Images missing from the replica are priced from full image service snapshots"""
+
+    @mock.patch('orders.catalog.get_images', return_value={42: SNAPSHOT})
+    def test_fallback_saves_full_snapshot(self, get_images):
+        image = get_sellable_images([42])[42]
+        get_images.assert_called_once_with([42])
+        self.assertEqual((image.category_id, image.photographer_id, image.licenses), (7, 3, ['standard']))
+        self.assertFalse(image.is_sellable('exclusive'))
+        self.assertTrue(CatalogImage.objects.filter(image_id=42, status='published').exists())
+
+    @override_settings(INTERNAL_SERVICE_TOKEN='')
+    @mock.patch('orders.catalog.get_images')
+    def test_no_fallback_without_internal_token(self, get_images):
+        self.assertEqual(get_sellable_images([42]), {})
+        get_images.assert_not_called()
+
+
+class QuoteSerializationTests(SimpleTestCase):
+    """Quoted money is rendered as exact decimal strings"""
+
+    def test_amounts_are_strings(self):
+        book = PriceBook(0, {('standard', ''): Decimal('1000.10')}, {'photographer': {}, 'category': {}}, [(2, Decimal('5'))], {})
+        lines = [
+            (CatalogImage(image_id=image_id, filename=f"{image_id}.jpg", type='photo'), 'standard')
+            for image_id in (1, 2)
+        ]
+        quote = book.quote(lines)
+        for line, (image, _) in zip(quote['lines'], lines):
+            line['filename'] = image.filename
+
+        data = QuoteResultSerializer(quote).data
+        self.assertEqual(data['subtotal'], '2000.20')
+        self.assertEqual(data['total'], '1900.20')
+        self.assertEqual(data['volume_discount_percent'], '5.00')
+        self.assertEqual([line['amount'] for line in data['lines']], ['950.10', '950.10'])
+
+
+class ImageClientTests(SimpleTestCase):
+    """Rejected tokens trip the breaker; unknown images are not re-asked right away"""
+
+    def setUp(self):
+        for name, value in [
+            ('_breaker', image_client.CircuitBreaker(2, 60)),
+            ('_cache', image_client.TTLCache(10, 60, 60)),
+            ('_misses', image_client.TTLCache(10, 60, 60)),
+        ]:
+            patcher = mock.patch.object(image_client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def respond(self, status_code, results=()):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = {'results': list(results), 'next_after': None}
+        patcher = mock.patch.object(image_client._session, 'get', return_value=response)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_rejected_token_opens_the_breaker(self):
+        get = self.respond(403)
+        for _ in range(3):
+            with self.assertRaises(image_client.ImageServiceUnavailable):
+                image_client.get_images([42])
+        self.assertEqual(get.call_count, 2)
+
+    def test_misses_are_cached(self):
+        get = self.respond(200, [SNAPSHOT])
+        self.assertEqual(image_client.get_images([42, 43]), {42: SNAPSHOT})
+        self.assertEqual(image_client.get_images([42, 43]), {42: SNAPSHOT})
+        self.assertEqual(get.call_count, 1)
@@ -5,7 +5,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserWalletViewSet, TopUpRequestViewSet, SubscriptionPlanViewSet,
-    UserSubscriptionViewSet, OrderViewSet, PaymentLogViewSet
+    UserSubscriptionViewSet, OrderViewSet, PaymentLogViewSet, ImageEventViewSet
 )
 
 router = DefaultRouter()
@@ -15,6 +15,7 @@ router.register(r'plans', SubscriptionPlanViewSet, basename='plans')
 router.register(r'subscriptions', UserSubscriptionViewSet, basename='subscriptions')
 router.register(r'orders', OrderViewSet, basename='orders')
 router.register(r'payment-logs', PaymentLogViewSet, basename='payment-logs')
+router.register(r'internal/image-events', ImageEventViewSet, basename='image-events')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -7,15 +7,20 @@ from rest_framework.response import Response
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction as db_transaction
-import requests
+from datetime import timedelta
+import hmac
 from .models import (
     UserWallet, WalletTransaction, TopUpRequest,
     SubscriptionPlan, UserSubscription, Order, PaymentLog
 )
+from .catalog import apply_snapshots, get_sellable_images
+from .image_client import ImageServiceUnavailable
+from .pricing import get_price_book, subscriber_plan_id
 from .serializers import (
     UserWalletSerializer, WalletTransactionSerializer, TopUpRequestSerializer,
     SubscriptionPlanSerializer, UserSubscriptionSerializer,
-    OrderSerializer, CreateOrderSerializer, PaymentLogSerializer
+    OrderSerializer, CreateOrderSerializer, QuoteSerializer, CheckoutSerializer, QuoteResultSerializer,
+    PaymentLogSerializer, ImageEventBatchSerializer
 )
 
 
@@ -243,21 +248,18 @@ class OrderViewSet(viewsets.ModelViewSet):
         license_type = serializer.validated_data['license_type']
         payment_method = serializer.validated_data['payment_method']
 
-        # Get image details from image service
+        # Local catalog replica (image service only for images it has not seen)
         try:
-            image_response = requests.get(
-                f"{settings.IMAGE_SERVICE_URL}/api/images/{image_id}/",
-                headers={'Authorization': request.META.get('HTTP_AUTHORIZATION', '')}
-            )
-            if image_response.status_code != 200:
-                return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
-            image_data = image_response.json()
-        except Exception as e:
-            return Response({'error': 'Failed to fetch image'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            image = get_sellable_images([image_id]).get(image_id)
+        except ImageServiceUnavailable:
+            return Response({'error': 'Image service unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if image is None:
+            return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not image.is_sellable(license_type):
+            return Response({'error': 'License not available for this image'},
+                          status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate price (simplified - should be configurable)
-        price_map = {'standard': 500, 'extended': 1500, 'exclusive': 5000}
-        amount = price_map.get(license_type, 500)
+        amount = get_price_book().quote([(image, license_type)], subscriber_plan_id(user_id))['total']
 
         with db_transaction.atomic():
             # Create order
@@ -266,7 +268,7 @@ class OrderViewSet(viewsets.ModelViewSet):
                 user_id=user_id,
                 user_email=user_email,
                 image_id=image_id,
-                image_filename=image_data.get('filename', ''),
+                image_filename=image.filename,
                 license_type=license_type,
                 amount=amount,
                 payment_method=payment_method,
@@ -276,11 +278,16 @@ class OrderViewSet(viewsets.ModelViewSet):
             # Process payment
             if payment_method == 'wallet':
                 wallet = UserWallet.objects.filter(user_id=user_id).first()
-                if not wallet or not wallet.has_sufficient_balance(amount):
+                try:
+                    if not wallet:
+                        raise ValueError("Insufficient balance")
+                    # Conditional UPDATE: concurrent checkouts cannot overdraw
+                    wallet.deduct_balance(amount, f"Order: {order.order_number}", reference=order.order_number)
+                except ValueError:
+                    db_transaction.set_rollback(True)
                     return Response({'error': 'Insufficient balance'}, 
                                   status=status.HTTP_400_BAD_REQUEST)
 
-                wallet.deduct_balance(amount, f"Order: {order.order_number}")
                 order.payment_status = 'paid'
                 order.completed_at = timezone.now()
                 order.set_download_expiry(hours=24)
@@ -312,6 +319,126 @@ class OrderViewSet(viewsets.ModelViewSet):
             'order': OrderSerializer(order).data
         }, status=status.HTTP_201_CREATED)
 
+    def price_cart(self, request, items):
+        """(quote, None) for a cart of sellable images, or (None, error response)"""
+        # One replica lookup for every image in the cart
+        image_ids = [item['image_id'] for item in items]
+        try:
+            images = get_sellable_images(image_ids)
+        except ImageServiceUnavailable:
+            return None, Response({'error': 'Image service unavailable'},
+                                  status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        missing = [image_id for image_id in image_ids if image_id not in images]
+        if missing:
+            return None, Response({'error': 'Images not found', 'image_ids': missing},
+                                  status=status.HTTP_404_NOT_FOUND)
+
+        unavailable = [
+            item['image_id'] for item in items
+            if not images[item['image_id']].is_sellable(item['license_type'])
+        ]
+        if unavailable:
+            return None, Response({'error': 'License not available for these images', 'image_ids': unavailable},
+                                  status=status.HTTP_400_BAD_REQUEST)
+
+        lines = [(images[item['image_id']], item['license_type']) for item in items]
+        quote = get_price_book().quote(lines, subscriber_plan_id(request.META.get('HTTP_X_USER_ID')))
+        for line, (image, _) in zip(quote['lines'], lines):
+            line['filename'] = image.filename
+        return quote, None
+
+    @action(detail=False, methods=['post'])
+    def quote(self, request):
+        """Price a cart without buying it"""
+        serializer = QuoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        quote, error = self.price_cart(request, serializer.validated_data['items'])
+        if error:
+            return error
+        return Response(QuoteResultSerializer(quote).data)
+
+    @action(detail=False, methods=['post'])
+    def checkout(self, request):
+        """Buy several images at once: one payment, one order per image"""
+        serializer = CheckoutSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = request.META.get('HTTP_X_USER_ID')
+        user_email = request.META.get('HTTP_X_USER_EMAIL')
+        payment_method = serializer.validated_data['payment_method']
+
+        quote, error = self.price_cart(request, serializer.validated_data['items'])
+        if error:
+            return error
+
+        checkout_reference = Order.generate_checkout_reference()
+        now = timezone.now()
+        orders = [
+            Order(
+                order_number=Order.generate_order_number(),
+                checkout_reference=checkout_reference,
+                user_id=user_id,
+                user_email=user_email,
+                image_id=line['image_id'],
+                image_filename=line['filename'],
+                license_type=line['license_type'],
+                amount=line['amount'],
+                currency=quote['currency'],
+                payment_method=payment_method,
+                payment_status='paid',
+                completed_at=now,
+                download_expires_at=now + timedelta(hours=settings.DOWNLOAD_TOKEN_EXPIRY_HOURS)
+            )
+            for line in quote['lines']
+        ]
+        total = quote['total']
+        quoted = QuoteResultSerializer(quote).data
+
+        with db_transaction.atomic():
+            if payment_method == 'wallet':
+                wallet = UserWallet.objects.filter(user_id=user_id).first()
+                try:
+                    if not wallet:
+                        raise ValueError("Insufficient balance")
+                    wallet.deduct_balance(
+                        total, f"Checkout: {checkout_reference} ({len(orders)} images)",
+                        reference=checkout_reference
+                    )
+                except ValueError:
+                    return Response({'error': 'Insufficient balance', 'total': quoted['total']},
+                                  status=status.HTTP_400_BAD_REQUEST)
+
+            elif payment_method == 'subscription':
+                subscription = UserSubscription.objects.select_for_update().filter(
+                    user_id=user_id,
+                    status='active'
+                ).first()
+
+                if not subscription or not subscription.is_valid():
+                    return Response({'error': 'No active subscription'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+
+                if not subscription.use_credits(len(orders)):
+                    return Response({'error': 'Insufficient subscription credits'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+
+                for order in orders:
+                    order.payment_reference = f"Subscription: {subscription.id}"
+
+            Order.objects.bulk_create(orders)
+
+        return Response({
+            'message': 'Checkout completed',
+            'checkout_reference': checkout_reference,
+            'total': quoted['total'],
+            'orders': OrderSerializer(orders, many=True).data,
+            'download_tokens': {order.image_id: str(order.download_token) for order in orders}
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'], url_path='download/(?P<token>[^/.]+)')
     def download(self, request, token=None):
         """Download image using download token"""
@@ -343,3 +470,27 @@ class PaymentLogViewSet(viewsets.ReadOnlyModelViewSet):
         if user_role == 'admin':
             return self.queryset
         return self.queryset.none()
+
+
+class InternalServicePermission(permissions.BasePermission):
+    """Service-to-service calls carrying the shared INTERNAL_SERVICE_TOKEN"""
+
+    def has_permission(self, request, view):
+        token = request.META.get('HTTP_X_INTERNAL_TOKEN', '')
+        return bool(settings.INTERNAL_SERVICE_TOKEN) and hmac.compare_digest(
+            token, settings.INTERNAL_SERVICE_TOKEN
+        )
+
+
+class ImageEventViewSet(viewsets.ViewSet):
+    """Image change events from the image service, applied to the catalog replica"""
+    authentication_classes = []
+    permission_classes = [InternalServicePermission]
+
+    def create(self, request):
+        serializer = ImageEventBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        applied = apply_snapshots(serializer.validated_data['events'])
+        return Response({'received': applied})
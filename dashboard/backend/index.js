@@ -16,7 +16,12 @@ app.use(cors({ origin: process.env.CORS_ORIGIN || 'http://localhost:3000', crede
 app.use(express.json());
 
 // Rate limiting
-const limiter = rateLimit({ windowMs: 15 * 60 * 1000, max: 100 });
+// Resumable upload chunks are exempt: one large file is hundreds of chunk requests
+const limiter = rateLimit({
+  windowMs: 15 * 60 * 1000,
+  max: 100,
+  skip: (req) => /^\/api\/upload-sessions\/[^/]+\/chunk$/.test(req.originalUrl.split('?')[0]),
+});
 app.use('/api/', limiter);
 
 // Service URLs
@@ -78,11 +83,42 @@ app.get('/api/auth/me', verifyToken, (req, res) => proxyRequest(req, res, AUTH_S
 
 // Image routes (upload, manage)
 app.get('/api/images', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/'));
+app.get('/api/images/search', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/search/'));
+app.get('/api/images/top-keywords', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/top-keywords/'));
 app.get('/api/images/:id', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/images/${req.params.id}/`));
 app.post('/api/images/upload', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/upload/'));
+app.post('/api/images/check-duplicates', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/check_duplicates/'));
 app.post('/api/images/:id/submit', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/images/${req.params.id}/submit/`));
 app.put('/api/images/:id/metadata', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/images/${req.params.id}/update_metadata/`));
 
+// Resumable chunked uploads
+app.post('/api/upload-sessions', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/upload-sessions/'));
+app.get('/api/upload-sessions/:id', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/upload-sessions/${req.params.id}/`));
+app.put('/api/upload-sessions/:id/chunk', verifyToken, express.raw({ type: '*/*', limit: '16mb' }), async (req, res) => {
+  try {
+    const response = await axios.put(`${IMAGE_SERVICE}/api/upload-sessions/${req.params.id}/chunk/`, req.body, {
+      headers: {
+        'Authorization': req.headers.authorization,
+        'X-User-Id': req.headers['x-user-id'],
+        'X-User-Email': req.headers['x-user-email'],
+        'X-User-Role': req.headers['x-user-role'],
+        'Content-Type': 'application/octet-stream',
+        'Content-Range': req.headers['content-range'],
+        ...(req.headers['content-md5'] && { 'Content-MD5': req.headers['content-md5'] }),
+      },
+      maxBodyLength: Infinity,
+    });
+    res.status(response.status).json(response.data);
+  } catch (error) {
+    const status = error.response?.status || 500;
+    const data = error.response?.data || { error: 'Service unavailable' };
+    res.status(status).json(data);
+  }
+});
+app.post('/api/upload-sessions/:id/finalize', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/upload-sessions/${req.params.id}/finalize/`));
+app.post('/api/upload-sessions/:id/abort', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/upload-sessions/${req.params.id}/abort/`));
+app.get('/api/bulk-ingests/:id', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/bulk-ingests/${req.params.id}/`));
+
 // Review routes (validator)
 app.get('/api/reviews/queue', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/reviews/queue/'));
 app.post('/api/reviews/:id/approve', verifyToken, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/reviews/${req.params.id}/approve/`));
@@ -46,17 +46,39 @@ export const authAPI = {
 // Images API
 export const imagesAPI = {
   list: (params) => api.get('/api/images', { params }),
+  search: (params) => api.get('/api/images/search', { params }),
+  topKeywords: (params) => api.get('/api/images/top-keywords', { params }),
   get: (id) => api.get(`/api/images/${id}`),
   upload: (formData) => api.post('/api/images/upload', formData, {
     headers: { 'Content-Type': 'multipart/form-data' }
   }),
+  checkDuplicates: (files) => api.post('/api/images/check-duplicates', { files }),
   updateMetadata: (id, data) => api.put(`/api/images/${id}/metadata`, data),
   submit: (id) => api.post(`/api/images/${id}/submit`),
 };
 
+// Resumable uploads API
+export const uploadSessionsAPI = {
+  create: (data) => api.post('/api/upload-sessions', data),
+  get: (id) => api.get(`/api/upload-sessions/${id}`),
+  putChunk: (id, blob, start, total) => api.put(`/api/upload-sessions/${id}/chunk`, blob, {
+    headers: {
+      'Content-Type': 'application/octet-stream',
+      'Content-Range': `bytes ${start}-${start + blob.size - 1}/${total}`,
+    }
+  }),
+  finalize: (id) => api.post(`/api/upload-sessions/${id}/finalize`),
+  abort: (id) => api.post(`/api/upload-sessions/${id}/abort`),
+};
+
+// Bulk ZIP ingest progress
+export const bulkIngestsAPI = {
+  get: (id) => api.get(`/api/bulk-ingests/${id}`),
+};
+
 // Reviews API
 export const reviewsAPI = {
-  getQueue: () => api.get('/api/reviews/queue'),
+  getQueue: (params) => api.get('/api/reviews/queue', { params }),
   approve: (id, data) => api.post(`/api/reviews/${id}/approve`, data),
   reject: (id, data) => api.post(`/api/reviews/${id}/reject`, data),
 };
@@ -7,7 +7,8 @@ export default function Dashboard() {
   const { user } = useAuthStore();
   const { data: images } = useQuery({
     queryKey: ['images', 'dashboard'],
-    queryFn: () => imagesAPI.list({ limit: 10 }),
+    // Keyset pages only carry a total when asked for one
+    queryFn: () => imagesAPI.list({ page_size: 10, count: 'exact' }),
   });
 
   const stats = [
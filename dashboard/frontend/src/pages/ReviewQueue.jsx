@@ -7,7 +7,7 @@ export default function ReviewQueue() {
   const queryClient = useQueryClient();
   const { data: queue, isLoading } = useQuery({
     queryKey: ['review-queue'],
-    queryFn: reviewsAPI.getQueue
+    queryFn: () => reviewsAPI.getQueue({ count: 'exact' })
   });
 
   const approveMutation = useMutation({
@@ -31,10 +31,10 @@ export default function ReviewQueue() {
   return (
     <div>
       <h1 className="text-2xl font-semibold text-gray-900">Review Queue</h1>
-      <p className="mt-2 text-sm text-gray-700">{queue?.data?.length || 0} images pending review</p>
+      <p className="mt-2 text-sm text-gray-700">{queue?.data?.count ?? queue?.data?.results?.length ?? 0} images pending review</p>
 
       <div className="mt-8 grid grid-cols-1 gap-6 sm:grid-cols-2 lg:grid-cols-3">
-        {queue?.data?.map((image) => (
+        {queue?.data?.results?.map((image) => (
           <div key={image.id} className="bg-white overflow-hidden shadow rounded-lg">
             <div className="aspect-w-16 aspect-h-9 bg-gray-200">
               {image.preview_url && (
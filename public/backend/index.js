@@ -90,6 +90,10 @@ app.get('/api/auth/me', requireAuth, (req, res) => proxyRequest(req, res, AUTH_S
 
 // Public image search and browse
 app.get('/api/images/search', optionalAuth, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/search/'));
+app.get('/api/images/map', optionalAuth, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/map/'));
+app.get('/api/images/top-keywords', optionalAuth, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/images/top-keywords/'));
+app.get('/api/suggestions', (req, res) => proxyRequest(req, res, IMAGE_SERVICE, '/api/suggestions/'));
+app.get('/api/images/:id/similar', optionalAuth, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/images/${req.params.id}/similar/`));
 app.get('/api/images/:id', optionalAuth, (req, res) => proxyRequest(req, res, IMAGE_SERVICE, `/api/images/${req.params.id}/`));
 
 // Categories, topics, places (public)
@@ -118,6 +122,8 @@ app.get('/api/subscriptions', requireAuth, (req, res) => proxyRequest(req, res,
 
 // Orders (user)
 app.post('/api/order', requireAuth, (req, res) => proxyRequest(req, res, ORDER_SERVICE, '/api/orders/create_order/'));
+app.post('/api/quote', requireAuth, (req, res) => proxyRequest(req, res, ORDER_SERVICE, '/api/orders/quote/'));
+app.post('/api/checkout', requireAuth, (req, res) => proxyRequest(req, res, ORDER_SERVICE, '/api/orders/checkout/'));
 app.get('/api/orders', requireAuth, (req, res) => proxyRequest(req, res, ORDER_SERVICE, '/api/orders/'));
 app.get('/api/orders/:id', requireAuth, (req, res) => proxyRequest(req, res, ORDER_SERVICE, `/api/orders/${req.params.id}/`));
 
@@ -37,7 +37,10 @@ export const authAPI = {
 
 export const imagesAPI = {
   search: (params) => api.get('/api/images/search', { params }),
+  mapPins: (params) => api.get('/api/images/map', { params }),
+  suggest: (q, params = {}) => api.get('/api/suggestions', { params: { q, ...params } }),
   get: (id) => api.get(`/api/images/${id}`),
+  similar: (id, params) => api.get(`/api/images/${id}/similar`, { params }),
 };
 
 export const categoriesAPI = {
@@ -63,6 +66,9 @@ export const subscriptionsAPI = {
 export const ordersAPI = {
   create: (imageId, licenseType, paymentMethod) => 
     api.post('/api/order', { image_id: imageId, license_type: licenseType, payment_method: paymentMethod }),
+  quote: (items) => api.post('/api/quote', { items }),
+  checkout: (items, paymentMethod) =>
+    api.post('/api/checkout', { items, payment_method: paymentMethod }),
   list: () => api.get('/api/orders'),
   download: (token) => api.get(`/api/download/${token}`),
 };